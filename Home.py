@@ -2,22 +2,13 @@
 
 # Libraries
 import streamlit as st
-from PIL import Image
 
-from src.util import add_footer
+from src import profiling
+from src.layout import render_header
+from src.util import add_footer, static_bytes
 
-# Layout
-st.set_page_config(page_title='RIGRA Survey', layout='wide')
-
-# RIGRA logo
-logo_rigra = Image.open('./images/rigra_logo.png')
-image_col1, image_col2, image_col3 = st.columns(3)
-with image_col1:
-    st.write(' ')
-with image_col2:
-    st.image(logo_rigra)
-with image_col3:
-    st.write(' ')
+# Layout and RIGRA logo
+render_header()
 
 # Title
 st.title('RIGRA Winter Survey 2022')
@@ -52,12 +43,12 @@ st.write(
 )
 
 ### Survey Data
-with open('exports/RIGRA_Survey_Winter2022_Summary.xlsx', 'rb') as f:
-    st.download_button(
-        label = '📁 Survey Data (.xlsx)',
-        data = f,
-        file_name = 'RIGRA_Survey_Winter2022.xlsx'
-        )
+# - workbook regenerated from the snapshot with `python -m src.export_lib`, read once per process
+st.download_button(
+    label = '📁 Survey Data (.xlsx)',
+    data = static_bytes('exports/RIGRA_Survey_Winter2022_Summary.xlsx'),
+    file_name = 'RIGRA_Survey_Winter2022.xlsx'
+    )
 
 
 ## Footnotes
@@ -67,5 +58,6 @@ st.write('')
 st.markdown('**Footnotes**')
 st.markdown('ℹ️ *Sentiment analysis is a technique used to understand the emotional tone of a text. In this case, it was used to analyze the free-text feedback and identify overall sentiment.*')
 
-## Add Footer
+## Debug panel (hidden unless enabled) and Footer
+profiling.render_panel()
 add_footer()
\ No newline at end of file
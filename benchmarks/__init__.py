@@ -0,0 +1,12 @@
+# benchmarks
+"""
+Description
+- Benchmark harness for the data path and the page scripts
+- generators.py builds seeded synthetic datasets in the schemas of the four survey sheets,
+  run.py times the library functions, filter paths and page scripts and writes the results to JSON
+- imports.py reports the cold-start import time of each app script
+
+Usage
+- python -m benchmarks.run --scales 1k,100k,1m --output bench.json [--compare previous.json]
+- python -m benchmarks.imports [--budget-ms 1500]
+"""
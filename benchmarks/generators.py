@@ -0,0 +1,171 @@
+# generators.py
+"""
+Description
+- Seeded synthetic survey data in the schemas of the four datasets (see data_sources/schema.py)
+- Labels are taken from the Winter 2022 survey, so the pages render the same categories at any scale
+- The same (n_rows, seed) always gives the same frames and therefore the same data versions
+"""
+
+## Module Imports
+import numpy as np
+import pandas as pd
+
+from pandas import DataFrame
+
+from data_sources import DATASETS
+from data_sources.schema import enforce_schema
+from data_sources.versioning import frame_hash, set_version
+from pipeline.sentiment import sentiment_label
+
+'''
+Hard Coded Variables
+'''
+RESIDENT_TYPES = ['Leaseholder', 'Non-resident leaseholder', 'Tenant']
+RESIDENT_LENGTHS = ['0-2 Years', '3-5 Years', '5-10 Years', '10+ Years', 'Not a resident']
+BUILDINGS = [
+    'Atlantic',
+    'Block 9 / Statham Court',
+    'Bond Court',
+    'Granite',
+    'Great Eastern Court',
+    'Henry Hudson',
+    'Iverson',
+    'Wyndham',
+    'Prefer Not To Say',
+]
+FLOORS = ['Ground', '1-5', '6-10', '11-15', '16+']
+# question_category -> question
+QUESTIONS = {
+    'Communal Areas': 'I am happy with the general upkeep of the communal areas such as hallways, gardens, walkways and playgrounds.',
+    'Building Expectations': 'To what extent does the building you live in meet the expectations that were set when purchasing and/or moving in?',
+    'Facilities Usage': 'How often do you use the facilities River Gardens such as health suite, swimming pool, concierge, tennis court, playgrounds?',
+    'R&R Satisfaction - Facilities': 'Overall I am satisfied with how R&R manage the facilities on the estate such as health suite, swimming pool, concierge, tennis court, playgrounds.',
+    'R&R Satisfaction - Services': 'I am satisfied with the services provided by R&R at River Gardens, such as financial management, cleaning and maintenance.',
+    'RIGRA - Purpose': 'I understand the purpose of RIGRA',
+    'RIGRA - Contact': 'I know how to contact RIGRA',
+    'RIGRA - Resident Representation': 'I feel RIGRA represents me well as a leaseholder / resident of River Gardens',
+}
+# Categories with a free-text question
+FREE_TEXT_CATEGORIES = ['Communal Areas', 'Building Expectations', 'R&R Satisfaction - Facilities', 'R&R Satisfaction - Services']
+# Vocabulary of the free-text responses
+WORDS = np.array([
+    'gardens', 'garden', 'hallways', 'hallway', 'lift', 'lifts', 'lobby', 'car', 'park', 'playground',
+    'cleaning', 'clean', 'dirty', 'maintenance', 'maintained', 'poorly', 'well', 'kept', 'service', 'charge',
+    'communal', 'areas', 'estate', 'building', 'repairs', 'slow', 'quick', 'happy', 'unhappy', 'generally',
+    'good', 'poor', 'great', 'terrible', 'fine', 'improved', 'improvement', 'needs', 'security', 'doors',
+    'dog', 'fouling', 'grass', 'lawn', 'plants', 'trees', 'concierge', 'gym', 'pool', 'health',
+    'suite', 'residents', 'management', 'heating', 'water', 'leaks', 'noise', 'bins', 'rubbish', 'parcels',
+])
+# Words per free-text response
+TEXT_WORDS = (4, 24)
+# Topics per category and words per topic
+TOPICS_PER_CATEGORY = 5
+WORDS_PER_TOPIC = 5
+# Share of respondents that left contact details
+CONTACTABLE_SHARE = 0.6
+
+'''
+Supporting Functions
+'''
+# Scale label to a row count: '1k' -> 1000, '1m' -> 1000000
+def parse_scale(scale: str) -> int:
+    scale = scale.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(scale[-1:], 1)
+    return int(float(scale.rstrip('km')) * multiplier)
+
+# Pick n labels with replacement as a categorical
+def _choice(rng: np.random.Generator, labels: list, n: int) -> pd.Categorical:
+    return pd.Categorical.from_codes(rng.integers(0, len(labels), n), categories=labels)
+
+# One row per respondent with the respondent attributes
+def _respondents(rng: np.random.Generator, n_respondents: int) -> DataFrame:
+    return pd.DataFrame({
+        'response_id': np.arange(1, n_respondents + 1),
+        'resident_type': _choice(rng, RESIDENT_TYPES, n_respondents),
+        'resident_length': _choice(rng, RESIDENT_LENGTHS, n_respondents),
+        'building_name': _choice(rng, BUILDINGS, n_respondents),
+        'building_floor': _choice(rng, FLOORS, n_respondents),
+        'contactable': rng.random(n_respondents) < CONTACTABLE_SHARE,
+    })
+
+# Random free-text responses
+def _texts(rng: np.random.Generator, n: int) -> list:
+    lengths = rng.integers(TEXT_WORDS[0], TEXT_WORDS[1] + 1, n)
+    words = WORDS[rng.integers(0, len(WORDS), (n, TEXT_WORDS[1]))]
+    return [' '.join(row[:length]) for row, length in zip(words, lengths)]
+
+# Cast to the dataset schema and stamp the data version
+def _finish(df: DataFrame, dataset: str) -> DataFrame:
+    df = enforce_schema(df.reset_index(drop=True), dataset)
+    return set_version(df, frame_hash(df))
+
+'''
+Dataset Generators
+'''
+# Feedback: one row per respondent and question (n_rows rounded up to whole respondents)
+def generate_feedback(n_rows: int, seed: int = 0) -> DataFrame:
+    rng = np.random.default_rng(seed)
+    n_respondents = max(-(-n_rows // len(QUESTIONS)), 1)
+    respondents = _respondents(rng, n_respondents)
+    rows = np.repeat(np.arange(n_respondents), len(QUESTIONS))
+    df = respondents.drop(columns='contactable').iloc[rows].reset_index(drop=True)
+    df['question'] = np.tile(list(QUESTIONS.values()), n_respondents)
+    df['question_category'] = np.tile(list(QUESTIONS), n_respondents)
+    scores = rng.integers(1, 6, len(df)).astype('float')
+    # a few unanswered questions
+    scores[rng.random(len(df)) < 0.02] = np.nan
+    df['feedback_score'] = scores
+    return _finish(df, 'feedback')
+
+# Summary: Type / Description / Number counts of the respondents behind a feedback frame
+def generate_summary(n_rows: int, seed: int = 0) -> DataFrame:
+    rng = np.random.default_rng(seed)
+    n_respondents = max(-(-n_rows // len(QUESTIONS)), 1)
+    respondents = _respondents(rng, n_respondents)
+    parts = [pd.DataFrame({
+        'Description': ['Responses', 'Contactable'],
+        'Type': 'all',
+        'Number': [n_respondents, int(respondents['contactable'].sum())],
+    })]
+    for column in ['resident_type', 'building_name', 'building_floor', 'resident_length']:
+        counts = respondents[column].value_counts(sort=False)
+        parts.append(pd.DataFrame({'Description': counts.index.astype(str), 'Type': column, 'Number': counts.to_numpy()}))
+    return _finish(pd.concat(parts, ignore_index=True)[['Description', 'Type', 'Number']], 'summary')
+
+# Sentiment: one row per free-text response (respondent and free-text category)
+def generate_sentiment(n_rows: int, seed: int = 0) -> DataFrame:
+    rng = np.random.default_rng(seed + 1)
+    n_respondents = max(-(-n_rows // len(FREE_TEXT_CATEGORIES)), 1)
+    respondents = _respondents(rng, n_respondents)
+    rows = np.repeat(np.arange(n_respondents), len(FREE_TEXT_CATEGORIES))[:n_rows]
+    df = respondents.drop(columns='contactable').iloc[rows].reset_index(drop=True)
+    df['feedback_category'] = np.tile(FREE_TEXT_CATEGORIES, n_respondents)[:n_rows]
+    df['free_text'] = _texts(rng, len(df))
+    df['polarity'] = np.round(rng.uniform(-1, 1, len(df)), 3)
+    df['subjectivity'] = np.round(rng.uniform(0, 1, len(df)), 3)
+    df['sentiment'] = sentiment_label(df['polarity'].to_numpy())
+    return _finish(df, 'sentiment')
+
+# Topics: feedback_category / topic / word rows (does not grow with n_rows, like the real topics sheet)
+def generate_topics(n_rows: int, seed: int = 0) -> DataFrame:
+    rng = np.random.default_rng(seed + 2)
+    rows = []
+    for category in ['All'] + FREE_TEXT_CATEGORIES:
+        for number in range(1, TOPICS_PER_CATEGORY + 1):
+            for word in rng.choice(WORDS, WORDS_PER_TOPIC, replace=False):
+                rows.append({'feedback_category': category, 'topic': f'Topic {number}', 'word': str(word)})
+    return _finish(pd.DataFrame(rows), 'topics')
+
+GENERATORS = {
+    'summary': generate_summary,
+    'feedback': generate_feedback,
+    'sentiment': generate_sentiment,
+    'topics': generate_topics,
+}
+
+'''
+Main Function
+'''
+# All four datasets at one scale: {dataset: DataFrame}
+def generate_datasets(n_rows: int, seed: int = 0, datasets=DATASETS) -> dict:
+    return {dataset: GENERATORS[dataset](n_rows, seed) for dataset in datasets}
@@ -0,0 +1,108 @@
+# imports.py
+"""
+Description
+- Cold-start import report for the app scripts
+- The module-level imports of each script are run in a fresh interpreter with `python -X importtime`,
+  so the report shows what a new server process pays before the first line of the page runs
+- Top-level modules are listed by cumulative import time; --budget-ms fails the run when a page
+  is slower to import, so cold-start regressions are caught next to the other benchmarks
+
+Usage
+- python -m benchmarks.imports [--top 10] [--output imports.json] [--budget-ms 1500]
+"""
+
+## Module Imports
+import argparse
+import ast
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+'''
+Hard Coded Variables
+'''
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_TOP = 10
+
+'''
+Supporting Functions
+'''
+# App scripts: Home.py and every page
+def app_scripts() -> list:
+    return ['Home.py'] + sorted(str(path.relative_to(ROOT)) for path in (ROOT / 'pages').glob('*.py'))
+
+# Module-level import statements of a script
+def script_imports(path: Path) -> list:
+    source = Path(path).read_text()
+    return [
+        ast.get_source_segment(source, node)
+        for node in ast.parse(source).body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+
+# Top-level modules imported by the statements: [(module, cumulative microseconds)]
+# - each `-X importtime` line is "import time: self [us] | cumulative | module", nested imports are indented
+def import_times(statements: list) -> list:
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', '\n'.join(statements)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    times = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        if not module.startswith('  '):
+            times.append((module.strip(), int(cumulative)))
+    return times
+
+'''
+Main Function
+'''
+# Import report of every app script
+# - modules the interpreter imports at startup are left out
+def report(top: int = DEFAULT_TOP) -> dict:
+    startup = {module for module, _ in import_times([])}
+    pages = {}
+    for script in app_scripts():
+        times = [item for item in import_times(script_imports(ROOT / script)) if item[0] not in startup]
+        pages[script] = {
+            'total_ms': sum(cumulative for _, cumulative in times) / 1000,
+            'modules': [
+                {'module': module, 'cumulative_ms': cumulative / 1000}
+                for module, cumulative in sorted(times, key=lambda item: -item[1])[:top]
+            ],
+        }
+    return {'python': sys.version.split()[0], 'pages': pages}
+
+'''
+Command Line
+'''
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report the cold-start import time of the RIGRA app scripts.')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='Slowest top-level modules listed per script')
+    parser.add_argument('--output', type=Path, default=None, help='Optional JSON report file')
+    parser.add_argument('--budget-ms', type=float, default=None, help='Fail if any script takes longer to import')
+    args = parser.parse_args(argv)
+
+    document = report(args.top)
+    over_budget = []
+    for script, page in document['pages'].items():
+        print(f'{script:<32} {page["total_ms"]:10.1f} ms')
+        for module in page['modules']:
+            print(f'    {module["module"]:<40} {module["cumulative_ms"]:10.1f} ms')
+        if args.budget_ms is not None and page['total_ms'] > args.budget_ms:
+            over_budget.append(script)
+    if args.output:
+        args.output.write_text(json.dumps(document, indent=2))
+        print(f'Wrote {args.output}')
+    if over_budget:
+        print(f'Over the {args.budget_ms} ms import budget: {", ".join(over_budget)}')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
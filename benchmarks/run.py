@@ -0,0 +1,248 @@
+# run.py
+"""
+Description
+- Times the library functions, the Feedback Explorer filter paths and full page script runs on
+  synthetic datasets (see generators.py) at several scales, and writes the timings to JSON
+- Cold timings build from scratch (shared caches cleared before every repeat), warm timings
+  are served from the per-data-version caches as on a rerun
+- Page scripts run headless with Streamlit's AppTest when it is available (Streamlit >= 1.28);
+  otherwise the script is executed in bare mode, where st.* calls render nothing but every
+  data, cache and chart path still runs
+
+Usage
+- python -m benchmarks.run [--scales 1k,100k,1m] [--repeat 5] [--seed 0] [--output bench.json]
+                           [--skip-pages] [--compare previous.json]
+"""
+
+## Module Imports
+import argparse
+import json
+import os
+import platform
+import runpy
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generators import generate_datasets, parse_scale
+from data_sources import local_files
+from data_sources.sync import sync
+from src import chart_lib, cube_lib, export_lib, feedback_lib, filter_lib, search_lib, summary_lib, topic_lib
+from src.util import shared_cache
+
+'''
+Hard Coded Variables
+'''
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_SCALES = '1k,100k,1m'
+DEFAULT_REPEAT = 5
+# Page scripts, run from the app root
+PAGES = ['Home.py', 'pages/1_Survey_Summary.py', 'pages/2_Feedback_Explorer.py', 'pages/3_Contact_Us.py']
+# Shared caches (name, max entries, max bytes) cleared before a cold run (with the snapshot frame cache of local_files)
+SHARED_CACHES = [
+    (cube_lib.CUBE_CACHE, 8, None),
+    (filter_lib.INDEX_CACHE, 8, None),
+    (filter_lib.RESULT_CACHE, 8, filter_lib.RESULT_CACHE_BYTES),
+    (search_lib.SEARCH_CACHE, 8, None),
+    (topic_lib.TOPIC_CACHE, 8, None),
+    (summary_lib.SUMMARY_CACHE, 8, None),
+    (summary_lib.SUMMARY_DATA_CACHE, 8, None),
+    (chart_lib.FIGURE_CACHE, chart_lib.FIGURE_CACHE_ENTRIES, None),
+    (chart_lib.AVERAGES_CACHE, 8, None),
+    (export_lib.EXPORT_CACHE, 8, export_lib.EXPORT_CACHE_BYTES),
+]
+# Results slower than this ratio are flagged by --compare
+REGRESSION_RATIO = 1.2
+
+'''
+Supporting Functions
+'''
+def clear_shared_caches():
+    for name, max_entries, max_bytes in SHARED_CACHES:
+        shared_cache(name, max_entries, max_bytes).clear()
+    local_files._frame_cache().clear()
+
+# Wall time of repeated calls: {'min_s', 'median_s', 'mean_s', 'repeat'}
+# - setup runs before every call and is not timed
+def time_call(func, repeat: int = DEFAULT_REPEAT, setup=None) -> dict:
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'mean_s': statistics.fmean(timings),
+        'repeat': repeat,
+    }
+
+# Current git commit (None outside a git checkout)
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+'''
+Benchmark Cases
+- Each case is (group, name, rows, function, setup); cold cases clear the shared caches in setup
+'''
+def library_cases(frames: dict) -> list:
+    df_summary, df_feedback = frames['summary'], frames['feedback']
+    df_sentiment, df_topics = frames['sentiment'], frames['topics']
+    cube = cube_lib.feedback_cube(df_feedback)
+    building = str(df_feedback['building_name'].iloc[0])
+    return [
+        ('summary_lib', 'build_summary_data', len(df_feedback), lambda: summary_lib.build_summary_data(df_feedback), None),
+        ('summary_lib', 'build_summary_index', len(df_summary), lambda: summary_lib.build_summary_index(df_summary), None),
+        ('summary_lib', 'metric_residents_all', len(df_summary), lambda: summary_lib.metric_residents_all(df_summary), None),
+        ('summary_lib', 'metric_residents_tenant', len(df_summary), lambda: summary_lib.metric_residents_tenant(df_summary), None),
+        ('summary_lib', 'filter_summary_data', len(df_summary), lambda: summary_lib.filter_summary_data(df_summary, 'building_name'), None),
+        ('feedback_lib', 'feedback_nps', len(df_feedback), lambda: feedback_lib.feedback_nps(df_feedback), None),
+        ('feedback_lib', 'feedback_nps_by_building', len(df_feedback), lambda: feedback_lib.feedback_nps(df_feedback, by='building_name'), None),
+        ('feedback_lib', 'feedback_questions_average', len(df_feedback), lambda: feedback_lib.feedback_questions_average(df_feedback), None),
+        ('feedback_lib', 'sentiment_percentages', len(df_sentiment), lambda: feedback_lib.sentiment_percentages(df_sentiment, 'positive'), None),
+        ('cube_lib', 'build_feedback_cube', len(df_feedback), lambda: cube_lib.build_feedback_cube(df_feedback), None),
+        ('cube_lib', 'feedback_cube_warm', len(df_feedback), lambda: cube_lib.feedback_cube(df_feedback), None),
+        ('cube_lib', 'cube_nps_percentages', len(cube), lambda: cube_lib.cube_nps_percentages(cube), None),
+        ('cube_lib', 'cube_questions_average', len(cube), lambda: cube_lib.cube_questions_average(cube), None),
+        ('topic_lib', 'build_topic_index', len(df_topics), lambda: topic_lib.build_topic_index(df_topics), None),
+        ('chart_lib', 'summary_bar_cold', len(df_summary), lambda: chart_lib.summary_bar(df_summary, 'building_name', 'Building Name'), clear_shared_caches),
+        ('chart_lib', 'building_average_bar_cold', len(cube), lambda: chart_lib.building_average_bar(cube, building), clear_shared_caches),
+        ('chart_lib', 'sentiment_diverging_bar_cold', len(df_sentiment), lambda: chart_lib.sentiment_diverging_bar(df_sentiment), clear_shared_caches),
+    ]
+
+def filter_cases(frames: dict) -> list:
+    df = frames['sentiment']
+    index = filter_lib.filter_index(df)
+    category = str(df['feedback_category'].iloc[0])
+    building = str(df['building_name'].iloc[0])
+    spec = filter_lib.FilterSpec.create(
+        feedback_category=category,
+        building_name=building,
+        sentiment=['positive', 'negative'],
+        polarity=(-0.5, 1.0),
+    )
+    search_spec = spec._replace(search='garden* "service charge"')
+    return [
+        ('filter_lib', 'build_filter_index', len(df), lambda: filter_lib.build_filter_index(df), None),
+        ('filter_lib', 'select', len(df), lambda: filter_lib.select(
+            index, ranges={'polarity': spec.polarity}, feedback_category=category, building_name=building, sentiment=list(spec.sentiment)
+        ), None),
+        ('filter_lib', 'run_query', len(df), lambda: filter_lib.run_query(df, index, spec), None),
+        ('filter_lib', 'query_cold', len(df), lambda: filter_lib.query(df, spec), clear_shared_caches),
+        ('filter_lib', 'query_warm', len(df), lambda: filter_lib.query(df, spec), None),
+        ('filter_lib', 'run_query_search', len(df), lambda: filter_lib.run_query(df, index, search_spec), None),
+        ('search_lib', 'build_search_index', len(df), lambda: search_lib.build_search_index(df), None),
+        ('search_lib', 'search', len(df), lambda: search_lib.search(search_lib.search_index(df), 'garden* "service charge"'), None),
+    ]
+
+# Run a page script headless once
+def run_page(path: Path):
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        AppTest = None
+    if AppTest is None:
+        runpy.run_path(str(path), run_name='__main__')
+        return
+    app = AppTest.from_file(str(path), default_timeout=600)
+    app.run()
+    if app.exception:
+        raise RuntimeError(f'{path} raised: {app.exception[0].message}')
+
+# Page script runs against a local snapshot of the synthetic datasets
+def page_cases(frames: dict, snapshot_dir: Path) -> list:
+    sync(snapshot_dir, frames=frames)
+    os.environ['RIGRA_BACKEND'] = 'local'
+    os.environ['RIGRA_SNAPSHOT_DIR'] = str(snapshot_dir)
+    rows = sum(len(df) for df in frames.values())
+    cases = []
+    for page in PAGES:
+        path = ROOT / page
+        cases.append(('pages', f'{page}:cold', rows, lambda path=path: run_page(path), clear_shared_caches))
+        cases.append(('pages', f'{page}:warm', rows, lambda path=path: run_page(path), None))
+    return cases
+
+'''
+Main Function
+'''
+# Benchmark every case at every scale and return the results document
+def run(scales: list, repeat: int = DEFAULT_REPEAT, seed: int = 0, pages: bool = True) -> dict:
+    results = []
+    os.chdir(ROOT)
+    for scale in scales:
+        n_rows = parse_scale(scale)
+        print(f'Generating {scale} ({n_rows} rows)')
+        frames = generate_datasets(n_rows, seed)
+        clear_shared_caches()
+        with tempfile.TemporaryDirectory(prefix='rigra-bench-') as snapshot_dir:
+            cases = library_cases(frames) + filter_cases(frames)
+            if pages:
+                cases += page_cases(frames, Path(snapshot_dir))
+            for group, name, rows, func, setup in cases:
+                timing = time_call(func, repeat, setup)
+                results.append({'scale': scale, 'group': group, 'name': name, 'rows': int(rows), **timing})
+                print(f'{scale:>6} {group:<12} {name:<40} {timing["median_s"] * 1000:10.2f} ms')
+    return {
+        'commit': git_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'seed': seed,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+        },
+        'results': results,
+    }
+
+# Print median-time ratios against a previous results file
+def compare(previous: dict, current: dict, threshold: float = REGRESSION_RATIO):
+    key = lambda result: (result['scale'], result['group'], result['name'])
+    before = {key(result): result for result in previous['results']}
+    print(f'Compared with {previous.get("commit")} ({previous.get("created_at")})')
+    for result in current['results']:
+        old = before.get(key(result))
+        if old is None or not old['median_s']:
+            continue
+        ratio = result['median_s'] / old['median_s']
+        flag = '  <- slower' if ratio > threshold else ''
+        print(f'{result["scale"]:>6} {result["group"]:<12} {result["name"]:<40} {ratio:6.2f}x{flag}')
+
+'''
+Command Line
+'''
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the RIGRA survey app data path and page scripts.')
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help='Comma-separated row counts, e.g. 1k,100k,1m')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Timed calls per case')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic datasets')
+    parser.add_argument('--output', type=Path, default=None, help='JSON results file (default: bench-<commit>.json)')
+    parser.add_argument('--skip-pages', action='store_true', help='Only benchmark the library functions')
+    parser.add_argument('--compare', type=Path, default=None, help='Previous JSON results file to compare against')
+    args = parser.parse_args(argv)
+    output = args.output.resolve() if args.output else None
+    previous = json.loads(args.compare.read_text()) if args.compare else None
+
+    document = run(args.scales.split(','), args.repeat, args.seed, pages=not args.skip_pages)
+    output = output or ROOT / f'bench-{document["commit"] or "local"}.json'
+    output.write_text(json.dumps(document, indent=2))
+    print(f'Wrote {output}')
+    if previous is not None:
+        compare(previous, document)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# data_sources
+"""
+Description
+- App sub-package for loading survey data
+- Each backend module exposes the same load_* functions, so pages can switch between
+  the live Google Sheets and local Parquet snapshots without code changes
+"""
+
+## Module Imports
+import importlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+'''
+Hard Coded Variables
+'''
+# Datasets every backend provides
+DATASETS = ('summary', 'feedback', 'sentiment', 'topics')
+
+# Backend name -> module implementing it (imported on demand)
+BACKENDS = {
+    'google_sheets': 'data_sources.google_sheets',
+    'local': 'data_sources.local_files',
+}
+DEFAULT_BACKEND = 'google_sheets'
+
+'''
+Data Bundle
+'''
+# Datasets returned by load_all() (datasets that were not requested are None)
+class SurveyData(NamedTuple):
+    summary: Optional[pd.DataFrame] = None
+    feedback: Optional[pd.DataFrame] = None
+    sentiment: Optional[pd.DataFrame] = None
+    topics: Optional[pd.DataFrame] = None
+
+'''
+Supporting Functions
+'''
+# Read a data source setting: RIGRA_<KEY> environment variable first, then [data_source] in secrets.toml
+def get_setting(key: str, default=None):
+    env_value = os.environ.get(f'RIGRA_{key.upper()}')
+    if env_value is not None:
+        return env_value
+    try:
+        return st.secrets['data_source'][key]
+    except (FileNotFoundError, KeyError):
+        return default
+
+# Run a backend's per-dataset loader for several datasets at once
+# - one thread per dataset, so a cold start costs the slowest sheet rather than the sum of all sheets
+# - worker threads share the script run context so Streamlit caches behave as in the main thread
+def load_concurrently(load_dataset, datasets=DATASETS) -> SurveyData:
+    for dataset in datasets:
+        if dataset not in DATASETS:
+            raise ValueError(f'Unknown dataset "{dataset}", expected one of {DATASETS}')
+    ctx = get_script_run_ctx()
+    def _attach_ctx():
+        add_script_run_ctx(threading.current_thread(), ctx)
+    with ThreadPoolExecutor(max_workers=max(len(datasets), 1), initializer=_attach_ctx) as pool:
+        futures = {dataset: pool.submit(load_dataset, dataset) for dataset in datasets}
+        return SurveyData(**{dataset: future.result() for dataset, future in futures.items()})
+
+'''
+Main Function
+'''
+# Return the configured backend module
+def get_backend(name: str = None):
+    name = name or get_setting('backend', DEFAULT_BACKEND)
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown data backend "{name}", expected one of {sorted(BACKENDS)}')
+    return importlib.import_module(BACKENDS[name])
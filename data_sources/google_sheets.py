@@ -14,6 +14,17 @@ import pandas as pd
 from gsheetsdb import connect
 import streamlit as st
 
+from data_sources import DATASETS, SurveyData, get_setting, load_concurrently
+from data_sources.refresh_cache import (
+    DEFAULT_JITTER,
+    DEFAULT_MAX_CONCURRENT_REFRESHES,
+    DEFAULT_REFRESH_INTERVAL,
+    StaleWhileRevalidateCache,
+)
+from data_sources.schema import append_rows, build_frame
+from data_sources.versioning import chain_version, data_version, frame_hash, set_version
+from src.profiling import mark_cache, span
+
 '''
 Define functions for obtaining data
 - Class allows for multiple sheet selection (using variables loaded from secrets.toml)
@@ -22,9 +33,19 @@ Define functions for obtaining data
 '''
 Hard Coded Variables
 '''
-# Time to live: the maximum number of seconds to keep an entry in the cache
-TTL = 24 * 60 * 60    
-    
+# Sheet cache settings ([data_source] in secrets.toml or RIGRA_<KEY> environment variables)
+# - refresh_interval: seconds before a sheet is refreshed in the background
+# - refresh_jitter: random extra delay as a fraction of refresh_interval
+# - max_concurrent_refreshes: cap on background sheet fetches across all sessions
+REFRESH_INTERVAL = float(get_setting('refresh_interval', DEFAULT_REFRESH_INTERVAL))
+REFRESH_JITTER = float(get_setting('refresh_jitter', DEFAULT_JITTER))
+MAX_CONCURRENT_REFRESHES = int(get_setting('max_concurrent_refreshes', DEFAULT_MAX_CONCURRENT_REFRESHES))
+
+# Append-only datasets refreshed incrementally by response_id
+INCREMENTAL_DATASETS = ('feedback', 'sentiment')
+# Number of incremental refreshes between full reloads (picks up edits to existing rows)
+FULL_REFRESH_EVERY = int(get_setting('full_refresh_every', 24))
+
 '''
 Supporting Functions
 '''
@@ -33,62 +54,116 @@ Supporting Functions
 def _get_connector():
     return connect()
 
-# SQL Query to Pandas DataFrame
-@st.experimental_memo(ttl = TTL)
-def _query_to_dataframe(_connector, query: str) -> pd.DataFrame:
-    rows = _connector.execute(query, headers=1)
-    dataframe = pd.DataFrame(list(rows))
-    return dataframe
+# Sheet URL for a dataset (from secrets.toml)
+def _sheet_url(dataset: str) -> str:
+    if dataset not in DATASETS:
+        raise ValueError(f'Unknown dataset "{dataset}", expected one of {DATASETS}')
+    return st.secrets["gsheets"][dataset]
+
+# Run a SQL query (uncached)
+# - rows are appended column by column while streaming from the cursor,
+#   then each column is cast once to the dataset schema (see schema.py)
+def _execute(connector, query: str, dataset: str = None) -> pd.DataFrame:
+    cursor = connector.execute(query, headers=1)
+    names = [column[0] for column in cursor.description]
+    columns = {name: [] for name in names}
+    appends = [columns[name].append for name in names]
+    for row in cursor:
+        for append, value in zip(appends, row):
+            append(value)
+    return build_frame(dataset, columns)
+
+# Highest response_id in a cached frame (None if it cannot be refreshed incrementally)
+def _high_water_mark(df: pd.DataFrame):
+    if 'response_id' not in df.columns or not df['response_id'].notna().any():
+        return None
+    return int(df['response_id'].max())
+
+# Full sheet load
+def _load_full(connector, gsheet_url: str, dataset: str) -> pd.DataFrame:
+    data = _execute(connector, f'SELECT * FROM "{gsheet_url}"', dataset)
+    return set_version(data, frame_hash(data))
+
+# Incremental sheet load: fetch only rows above the high-water response_id and append them
+# - the appended rows are the tail of the returned frame, recorded in its attrs with the base version,
+#   so derived aggregates can be updated from the delta (see versioning.py)
+def _load_incremental(connector, gsheet_url: str, dataset: str, previous: pd.DataFrame, high_water: int) -> pd.DataFrame:
+    new_rows = _execute(connector, f'SELECT * FROM "{gsheet_url}" WHERE response_id > {high_water}', dataset)
+    if new_rows.empty:
+        return previous
+    base_version = data_version(previous)
+    data = append_rows(previous, new_rows, dataset)
+    return set_version(data, chain_version(base_version, new_rows), base_version, len(new_rows))
+
+# Share one stale-while-revalidate sheet cache across all users connected to the app
+# - keys are (sheet url, dataset); after the first load no request waits on Google Sheets
+# - append-only datasets are refreshed by response_id, with a periodic full reload
+@st.experimental_singleton()
+def _get_sheet_cache() -> StaleWhileRevalidateCache:
+    connector = _get_connector()
+    incremental_refreshes = {}
+    def _load_sheet(key, previous):
+        gsheet_url, dataset = key
+        high_water = None if previous is None or dataset not in INCREMENTAL_DATASETS else _high_water_mark(previous)
+        if high_water is not None and incremental_refreshes.get(key, 0) < FULL_REFRESH_EVERY:
+            incremental_refreshes[key] = incremental_refreshes.get(key, 0) + 1
+            return _load_incremental(connector, gsheet_url, dataset, previous, high_water)
+        incremental_refreshes[key] = 0
+        return _load_full(connector, gsheet_url, dataset)
+    return StaleWhileRevalidateCache(
+        _load_sheet,
+        refresh_interval = REFRESH_INTERVAL,
+        jitter = REFRESH_JITTER,
+        max_concurrent_refreshes = MAX_CONCURRENT_REFRESHES,
+    )
 
 # Query from Google Sheet to Pandas DataFrame
-@st.experimental_memo(ttl = 600)
-def _get_data(_connector, gsheet_url) -> pd.DataFrame:
-    return _query_to_dataframe(_connector, f'SELECT * FROM "{gsheet_url}"')
+# - shallow copy, so callers adding columns never touch the shared cached frame
+def _get_data(gsheet_url, dataset: str = None) -> pd.DataFrame:
+    sheet_cache = _get_sheet_cache()
+    with span(f'load {dataset}') as load_span:
+        mark_cache(sheet_cache.contains((gsheet_url, dataset)))
+        data = sheet_cache.get((gsheet_url, dataset)).copy(deep=False)
+        load_span.rows = len(data)
+    return data
 
 '''
 Main Function
 '''
 
-## Survey summary data
-def load_summary_data():
-    # Create connector
-    gsheet_connector = _get_connector()
+## Any dataset by name
+def load_dataset(dataset: str) -> pd.DataFrame:
     # Connect to the google sheet
-    gsheets_url = st.secrets["gsheets"]["summary"]
-    # Download data
-    data = _get_data(gsheet_connector, gsheets_url)
+    gsheets_url = _sheet_url(dataset)
+    # Download data (or serve it from the shared cache)
+    data = _get_data(gsheets_url, dataset)
     # Return data
     return data
 
+## Any dataset by name, bypassing the app caches (used by the snapshot sync job)
+def fetch_dataset(dataset: str, connector=None) -> pd.DataFrame:
+    connector = connector or connect()
+    return _load_full(connector, _sheet_url(dataset), dataset)
+
+## Several datasets at once, fetched concurrently
+def load_all(datasets=DATASETS) -> SurveyData:
+    # Resolve the shared cache and sheet URLs up front so worker threads only fetch
+    _get_sheet_cache()
+    gsheets_urls = {dataset: _sheet_url(dataset) for dataset in datasets}
+    return load_concurrently(lambda dataset: _get_data(gsheets_urls[dataset], dataset), datasets)
+
+## Survey summary data
+def load_summary_data():
+    return load_dataset('summary')
+
 ## Feedback data
 def load_feedback_data():
-    # Create connector
-    gsheet_connector = _get_connector()
-    # Connect to the google sheet
-    gsheets_url = st.secrets["gsheets"]["feedback"]
-    # Download data
-    data = _get_data(gsheet_connector, gsheets_url)
-    # Return data
-    return data
+    return load_dataset('feedback')
 
 ## Sentiment data
 def load_sentiment_data():
-    # Create connector
-    gsheet_connector = _get_connector()
-    # Connect to the google sheet
-    gsheets_url = st.secrets["gsheets"]["sentiment"]
-    # Download data
-    data = _get_data(gsheet_connector, gsheets_url)
-    # Return data
-    return data
+    return load_dataset('sentiment')
 
 ## Topic data
 def load_topic_data():
-    # Create connector
-    gsheet_connector = _get_connector()
-    # Connect to the google sheet
-    gsheets_url = st.secrets["gsheets"]["topics"]
-    # Download data
-    data = _get_data(gsheet_connector, gsheets_url)
-    # Return data
-    return data
\ No newline at end of file
+    return load_dataset('topics')
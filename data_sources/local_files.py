@@ -0,0 +1,120 @@
+# local_files.py
+"""
+Description
+- App sub-module for loading survey data from local Parquet snapshots
+- Mirrors the load_* functions of google_sheets.py so it can be used as a drop-in backend
+"""
+
+"""
+Script Setup
+- Snapshot directory is set with RIGRA_SNAPSHOT_DIR or [data_source] snapshot_dir in secrets.toml
+- Snapshots published by sync.py are read from the version named in <snapshot_dir>/CURRENT
+- Without a CURRENT file (e.g. a test fixture directory) each dataset is read from <snapshot_dir>/<dataset>.parquet
+"""
+
+## Module Imports
+import threading
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+from cachetools import LRUCache
+
+from data_sources import DATASETS, SurveyData, get_setting, load_concurrently
+from data_sources.schema import enforce_schema
+from data_sources.sync import current_version, read_manifest, version_dir
+from data_sources.versioning import set_version
+from src.profiling import mark_cache, span
+
+'''
+Hard Coded Variables
+'''
+# Default snapshot directory (relative to the app root)
+DEFAULT_SNAPSHOT_DIR = './snapshots'
+
+'''
+Supporting Functions
+'''
+# Directory holding the Parquet snapshots
+def snapshot_dir() -> Path:
+    return Path(get_setting('snapshot_dir', DEFAULT_SNAPSHOT_DIR))
+
+# Active snapshot version (None for a flat, unversioned directory)
+# - read CURRENT once per load and pass the result on, so a sync swapping it mid-load cannot mix versions
+def active_version() -> str:
+    return current_version(snapshot_dir())
+
+# Directory holding the dataset files of a snapshot version
+def active_dir(version: str) -> Path:
+    if version is None:
+        return snapshot_dir()
+    return version_dir(snapshot_dir(), version)
+
+# Path of a single dataset file in a snapshot version
+def dataset_path(dataset: str, version: str) -> Path:
+    if dataset not in DATASETS:
+        raise ValueError(f'Unknown dataset "{dataset}", expected one of {DATASETS}')
+    return active_dir(version) / f'{dataset}.parquet'
+
+# Frames read from Parquet, shared by every session: (path, modification time, dataset) -> DataFrame
+# - two entries per dataset, so the previous version stays available while a new snapshot is picked up
+@st.experimental_singleton()
+def _frame_cache() -> LRUCache:
+    return LRUCache(maxsize = 2 * len(DATASETS))
+
+_frame_cache_lock = threading.Lock()
+
+# Parquet file to Pandas DataFrame (shared cached frame; treat as read-only)
+# - modification time is part of the cache key, so a rewritten snapshot is picked up straight away
+# - the schema cast is a no-op for snapshots written by sync.py, but normalises hand-made fixtures
+def _read_parquet(path: str, modified_ns: int, dataset: str) -> pd.DataFrame:
+    cache = _frame_cache()
+    key = (path, modified_ns, dataset)
+    with _frame_cache_lock:
+        data = cache.get(key)
+    mark_cache(data is not None)
+    if data is None:
+        data = enforce_schema(pd.read_parquet(path), dataset)
+        with _frame_cache_lock:
+            cache[key] = data
+    return data
+
+'''
+Main Function
+'''
+
+## Any dataset by name
+def load_dataset(dataset: str) -> pd.DataFrame:
+    snapshot_version = active_version()
+    path = dataset_path(dataset, snapshot_version)
+    if not path.exists():
+        raise FileNotFoundError(f'No snapshot for "{dataset}" at {path}')
+    modified_ns = path.stat().st_mtime_ns
+    with span(f'load {dataset}') as load_span:
+        # shallow copy, so callers adding columns (or the version stamp below) never touch the shared frame
+        data = _read_parquet(str(path), modified_ns, dataset).copy(deep=False)
+        load_span.rows = len(data)
+    # Snapshot content hash from the manifest, or the file modification time for unversioned directories
+    manifest = read_manifest(snapshot_dir(), snapshot_version)
+    version = manifest.get('datasets', {}).get(dataset, {}).get('sha256') or f'{path}@{modified_ns}'
+    return set_version(data, version)
+
+## Several datasets at once, read concurrently
+def load_all(datasets=DATASETS) -> SurveyData:
+    return load_concurrently(load_dataset, datasets)
+
+## Survey summary data
+def load_summary_data():
+    return load_dataset('summary')
+
+## Feedback data
+def load_feedback_data():
+    return load_dataset('feedback')
+
+## Sentiment data
+def load_sentiment_data():
+    return load_dataset('sentiment')
+
+## Topic data
+def load_topic_data():
+    return load_dataset('topics')
@@ -0,0 +1,121 @@
+# refresh_cache.py
+"""
+Description
+- Stale-while-revalidate cache shared by every session of the app
+- Once a value has been loaded it is always served straight away; when it is older than the
+  refresh interval a background thread reloads it and swaps it in when the fetch succeeds
+- Refreshes are jittered and capped, so many sessions never stampede the upstream sheet
+"""
+
+## Module Imports
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+'''
+Hard Coded Variables
+'''
+# Seconds before a cached value is refreshed in the background
+DEFAULT_REFRESH_INTERVAL = 600
+# Random extra delay, as a fraction of the refresh interval, so keys do not refresh in lock-step
+DEFAULT_JITTER = 0.1
+# Maximum number of background refreshes running at once
+DEFAULT_MAX_CONCURRENT_REFRESHES = 2
+
+'''
+Cache
+'''
+# Cached value and the time (time.monotonic) after which it should be refreshed
+class _Entry(NamedTuple):
+    value: Any
+    refresh_at: float
+
+
+class StaleWhileRevalidateCache:
+    # loader: called with the key and the currently cached value (None on the first load),
+    #         returns the value to cache
+    def __init__(
+        self,
+        loader: Callable[[Hashable, Any], Any],
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        jitter: float = DEFAULT_JITTER,
+        max_concurrent_refreshes: int = DEFAULT_MAX_CONCURRENT_REFRESHES,
+    ):
+        self._loader = loader
+        self.refresh_interval = float(refresh_interval)
+        self.jitter = float(jitter)
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._refreshing = set()
+        self._refresh_slots = threading.BoundedSemaphore(max(int(max_concurrent_refreshes), 1))
+
+    # Next refresh time for a value loaded now
+    def _next_refresh(self) -> float:
+        return time.monotonic() + self.refresh_interval * (1 + random.uniform(0, self.jitter))
+
+    # Per-key lock, so only one session performs the first (blocking) load of a key
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    # Load a key and store the result
+    def _load(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        value = self._loader(key, None if entry is None else entry.value)
+        with self._lock:
+            self._entries[key] = _Entry(value, self._next_refresh())
+        return value
+
+    # Background refresh: keep serving the stale value if the reload fails
+    def _refresh(self, key: Hashable):
+        try:
+            self._load(key)
+        except Exception:
+            logger.warning('Background refresh of %r failed, serving the previous value', key, exc_info=True)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries[key] = entry._replace(refresh_at=self._next_refresh())
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+            self._refresh_slots.release()
+
+    # Start a background refresh unless one is already running or all refresh slots are busy
+    def _maybe_refresh(self, key: Hashable):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            if not self._refresh_slots.acquire(blocking=False):
+                return
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key,), name=f'refresh-{key}', daemon=True).start()
+
+    # Cached value for a key; only the very first request for a key waits on the loader
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._key_lock(key):
+                entry = self._entries.get(key)
+                if entry is None:
+                    return self._load(key)
+        if time.monotonic() >= entry.refresh_at:
+            self._maybe_refresh(key)
+        return entry.value
+
+    # Whether a key has been loaded (a stale value still counts)
+    def contains(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    # Drop one key (or everything), forcing the next request to load it again
+    def clear(self, key: Hashable = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,102 @@
+# schema.py
+"""
+Description
+- Declared column types for each survey dataset
+- Low-cardinality labels are categoricals, scores are small (nullable) ints and free text is Arrow-backed,
+  which keeps every cached copy small and speeds up the groupby/filter work on the pages
+"""
+
+## Module Imports
+import pandas as pd
+
+from pandas import DataFrame
+
+'''
+Hard Coded Variables
+'''
+# Arrow-backed string dtype
+STRING = 'string[pyarrow]'
+
+# Dataset -> {column: dtype}; columns that are not listed keep their inferred dtype
+SCHEMAS = {
+    'summary': {
+        'Type': 'category',
+        'Description': 'category',
+        'Number': 'Int32',
+    },
+    'feedback': {
+        'response_id': 'Int32',
+        'resident_type': 'category',
+        'resident_length': 'category',
+        'building_name': 'category',
+        'building_floor': 'category',
+        'question': STRING,
+        'question_category': STRING,
+        'feedback_score': 'Int8',
+    },
+    'sentiment': {
+        'response_id': 'Int32',
+        'resident_type': 'category',
+        'resident_length': 'category',
+        'building_name': 'category',
+        'building_floor': 'category',
+        'feedback_category': 'category',
+        'sentiment': 'category',
+        'polarity': 'float32',
+        'subjectivity': 'float32',
+        'free_text': STRING,
+    },
+    'topics': {
+        'feedback_category': 'category',
+        'word': STRING,
+    },
+}
+
+'''
+Supporting Functions
+'''
+# Column values as a Series (an empty column is object dtype, which pandas otherwise warns about)
+def _series(values) -> pd.Series:
+    return pd.Series(values, dtype=object if len(values) == 0 else None)
+
+# Cast one column of values to its declared dtype
+# - numeric columns go through to_numeric first so sheet blanks/text become missing values
+def _to_dtype(values, dtype: str) -> pd.Series:
+    series = _series(values)
+    if dtype in ('Int8', 'Int16', 'Int32', 'Int64', 'float32', 'float64'):
+        series = pd.to_numeric(series, errors='coerce')
+        if dtype.startswith('Int'):
+            series = series.round()
+    return series.astype(dtype)
+
+'''
+Main Function
+'''
+# Build a DataFrame with the declared schema from {column: list of values}
+def build_frame(dataset: str, columns: dict) -> DataFrame:
+    schema = SCHEMAS.get(dataset, {})
+    return pd.DataFrame({
+        name: _to_dtype(values, schema[name]) if name in schema else _series(values)
+        for name, values in columns.items()
+    })
+
+# Cast an existing DataFrame to the declared schema (columns already of the right dtype are left untouched)
+def enforce_schema(df: DataFrame, dataset: str) -> DataFrame:
+    schema = SCHEMAS.get(dataset, {})
+    casts = {
+        name: dtype for name, dtype in schema.items()
+        if name in df.columns and not df[name].dtype == dtype
+    }
+    if not casts:
+        return df
+    df = df.copy()
+    for name, dtype in casts.items():
+        df[name] = _to_dtype(df[name], dtype).values
+    return df
+
+# Append new rows to a frame, keeping the declared schema
+# - categorical columns with new labels are re-cast once after the concat
+def append_rows(df: DataFrame, new_rows: DataFrame, dataset: str) -> DataFrame:
+    if new_rows.empty:
+        return df
+    return enforce_schema(pd.concat([df, new_rows], ignore_index=True), dataset)
@@ -0,0 +1,170 @@
+# sync.py
+"""
+Description
+- Snapshot sync job: pulls every Google Sheet in one pass and writes a versioned Parquet snapshot
+- The app reads the snapshot through the local backend, so sheet latency never reaches a page load
+
+Usage
+- python -m data_sources.sync [--snapshot-dir ./snapshots] [--keep 5] [--force]
+"""
+
+"""
+Snapshot Layout
+- <snapshot_dir>/versions/<version>/<dataset>.parquet
+- <snapshot_dir>/versions/<version>/manifest.json
+- <snapshot_dir>/CURRENT holds the active version name and is swapped atomically
+"""
+
+## Module Imports
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+from data_sources import DATASETS
+from data_sources.versioning import frame_hash
+
+'''
+Hard Coded Variables
+'''
+# Pointer file naming the active snapshot version
+CURRENT_FILE = 'CURRENT'
+# Directory holding every snapshot version
+VERSIONS_DIR = 'versions'
+# Manifest written alongside the Parquet files of each version
+MANIFEST_FILE = 'manifest.json'
+# Number of snapshot versions kept on disk
+DEFAULT_KEEP = 5
+
+'''
+Supporting Functions
+'''
+# Name of the active snapshot version (None if nothing has been synced yet)
+def current_version(snapshot_dir: Path) -> str:
+    pointer = Path(snapshot_dir) / CURRENT_FILE
+    if not pointer.exists():
+        return None
+    return pointer.read_text().strip() or None
+
+# Directory of a snapshot version
+def version_dir(snapshot_dir: Path, version: str) -> Path:
+    return Path(snapshot_dir) / VERSIONS_DIR / version
+
+# Manifest of a snapshot version ({} if missing)
+def read_manifest(snapshot_dir: Path, version: str) -> dict:
+    if version is None:
+        return {}
+    path = version_dir(snapshot_dir, version) / MANIFEST_FILE
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+# Write a small text file atomically (write to a temporary file, then rename over the target)
+def _atomic_write_text(path: Path, text: str):
+    tmp_path = path.with_name(f'.{path.name}.{uuid.uuid4().hex}.tmp')
+    tmp_path.write_text(text)
+    os.replace(tmp_path, path)
+
+# Reuse an unchanged dataset file from the previous version (hard link where possible)
+def _reuse_file(source: Path, target: Path):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+# Remove all but the newest `keep` versions (never the active one)
+def _prune_versions(snapshot_dir: Path, keep: int):
+    versions_root = Path(snapshot_dir) / VERSIONS_DIR
+    active = current_version(snapshot_dir)
+    versions = sorted(
+        (p for p in versions_root.iterdir() if p.is_dir() and not p.name.startswith('.')),
+        key=lambda p: read_manifest(snapshot_dir, p.name).get('created_at', ''),
+        reverse=True,
+    )
+    for path in versions[keep:]:
+        if path.name != active:
+            shutil.rmtree(path, ignore_errors=True)
+
+'''
+Main Function
+'''
+# Fetch all datasets and publish a new snapshot version if anything changed
+# - frames: optional {dataset: DataFrame} to publish instead of fetching from Google Sheets
+# - returns the active version name
+def sync(snapshot_dir: Path, frames: dict = None, keep: int = DEFAULT_KEEP, force: bool = False) -> str:
+    snapshot_dir = Path(snapshot_dir)
+    (snapshot_dir / VERSIONS_DIR).mkdir(parents=True, exist_ok=True)
+
+    ## Fetch every sheet in one pass
+    if frames is None:
+        from data_sources import google_sheets
+        from gsheetsdb import connect
+        connector = connect()
+        frames = {dataset: google_sheets.fetch_dataset(dataset, connector) for dataset in DATASETS}
+
+    ## Compare against the active version
+    previous_version = current_version(snapshot_dir)
+    previous = read_manifest(snapshot_dir, previous_version).get('datasets', {})
+    hashes = {dataset: frame_hash(df) for dataset, df in frames.items()}
+    unchanged = {
+        dataset for dataset, digest in hashes.items()
+        if previous.get(dataset, {}).get('sha256') == digest
+    }
+    if not force and previous_version is not None and unchanged == set(DATASETS):
+        print(f'No changes, keeping snapshot {previous_version}')
+        return previous_version
+
+    ## Version name is derived from the content of every dataset
+    version = hashlib.sha256(
+        ''.join(hashes[dataset] for dataset in sorted(hashes)).encode()
+    ).hexdigest()[:16]
+    target_dir = version_dir(snapshot_dir, version)
+
+    if not target_dir.exists():
+        ## Write into a temporary directory, then rename it into place
+        tmp_dir = snapshot_dir / VERSIONS_DIR / f'.{version}.{uuid.uuid4().hex}.tmp'
+        tmp_dir.mkdir()
+        manifest = {'version': version, 'created_at': datetime.now(timezone.utc).isoformat(), 'datasets': {}}
+        for dataset, df in frames.items():
+            file_name = f'{dataset}.parquet'
+            if dataset in unchanged:
+                _reuse_file(version_dir(snapshot_dir, previous_version) / file_name, tmp_dir / file_name)
+                status = 'unchanged'
+            else:
+                df.to_parquet(tmp_dir / file_name, index=False)
+                status = 'updated'
+            manifest['datasets'][dataset] = {
+                'file': file_name,
+                'sha256': hashes[dataset],
+                'rows': int(len(df)),
+                'columns': [str(c) for c in df.columns],
+            }
+            print(f'{dataset}: {status} ({len(df)} rows)')
+        (tmp_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+        os.rename(tmp_dir, target_dir)
+
+    ## Point the app at the new version
+    _atomic_write_text(snapshot_dir / CURRENT_FILE, version)
+    print(f'Published snapshot {version}')
+    _prune_versions(snapshot_dir, keep)
+    return version
+
+'''
+Command Line
+'''
+def main(argv=None):
+    from data_sources.local_files import snapshot_dir
+    parser = argparse.ArgumentParser(description='Sync the RIGRA survey sheets to a local Parquet snapshot.')
+    parser.add_argument('--snapshot-dir', type=Path, default=None, help='Snapshot directory (default: RIGRA_SNAPSHOT_DIR or ./snapshots)')
+    parser.add_argument('--keep', type=int, default=DEFAULT_KEEP, help='Number of snapshot versions to keep')
+    parser.add_argument('--force', action='store_true', help='Publish a new version even if nothing changed')
+    args = parser.parse_args(argv)
+    sync(args.snapshot_dir or snapshot_dir(), keep=args.keep, force=args.force)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# versioning.py
+"""
+Description
+- Data version labels for loaded DataFrames
+- Every backend stamps the frames it returns with a version in DataFrame.attrs, which the
+  libraries use as the cache key for anything derived from a dataset (aggregates, indexes, figures)
+"""
+
+## Module Imports
+import hashlib
+import json
+
+import pandas as pd
+
+from pandas import DataFrame
+
+'''
+Hard Coded Variables
+'''
+# DataFrame.attrs keys
+VERSION_ATTR = 'data_version'
+# Version the frame was extended from by an incremental refresh (see google_sheets.py)
+BASE_VERSION_ATTR = 'base_version'
+# Number of rows appended to the base version (the new rows are the tail of the frame)
+APPENDED_ROWS_ATTR = 'appended_rows'
+
+'''
+Supporting Functions
+'''
+# Content hash of a DataFrame (values, index, column names and dtypes)
+def frame_hash(df: DataFrame) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()
+
+# Version label derived from a previous version and the rows appended to it
+def chain_version(base_version: str, appended: DataFrame) -> str:
+    return hashlib.sha256((base_version + frame_hash(appended)).encode()).hexdigest()
+
+'''
+Main Function
+'''
+# Stamp a frame with its data version (in place) and return it
+def set_version(df: DataFrame, version: str, base_version: str = None, appended_rows: int = 0) -> DataFrame:
+    df.attrs[VERSION_ATTR] = version
+    df.attrs[BASE_VERSION_ATTR] = base_version
+    df.attrs[APPENDED_ROWS_ATTR] = int(appended_rows)
+    return df
+
+# Data version of a frame (hashed from its content if no backend stamped it)
+# - pandas carries attrs over to filtered/derived frames, so only key caches on the version of a
+#   frame as it was loaded, together with any filter parameters
+def data_version(df: DataFrame) -> str:
+    version = df.attrs.get(VERSION_ATTR)
+    if version is None:
+        version = frame_hash(df)
+    return version
@@ -2,17 +2,11 @@
 
 ## Library Imports
 import streamlit as st
-from src.util import add_footer
-from PIL import Image
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-
-from data_sources import google_sheets
-from plotly.subplots import make_subplots
-from src import feedback_lib
-from src.resources import colour_palette
+from src.util import TABLE_PAGE_SIZES, add_footer, page_bounds, page_count
+
+from data_sources import get_backend
+from src import export_lib, filter_lib, profiling
+from src.layout import render_header
 
 ## Outline
 # 1. Headline
@@ -22,18 +16,8 @@ from src.resources import colour_palette
 #   3b: By building
 #   3c: By Question Category
 
-# Layout
-st.set_page_config(page_title='RIGRA Survey', layout='wide')
-
-# RIGRA logo
-logo_rigra = Image.open('./images/rigra_logo.png')
-image_col1, image_col2, image_col3 = st.columns(3)
-with image_col1:
-    st.write(' ')
-with image_col2:
-    st.image(logo_rigra)
-with image_col3:
-    st.write(' ')
+# Layout and RIGRA logo
+render_header()
     
 # Title
 st.title('Feedback Explorer')
@@ -42,32 +26,28 @@ st.write('Please use the interactive table below to explore the feedback data fr
 st.markdown('---')
 st.write('')
 # Data Sources
-df = google_sheets.load_sentiment_data()
-ori_score_pos = feedback_lib.sentiment_percentages(df, "positive")
-ori_score_neu = feedback_lib.sentiment_percentages(df, "neutral")
-ori_score_neg = feedback_lib.sentiment_percentages(df, "negative")
+data_source = get_backend()
+df = data_source.load_sentiment_data()
+# - bitmap index over the filter columns (built once per data version)
+df_index = filter_lib.filter_index(df)
+ori_scores = filter_lib.query(df, filter_lib.FilterSpec()).percentages
 
 # > Question Category Selection
 st_q_01_tab03, st_q_02_tab03 = st.columns(2)
-df_tab_03 = df
 with st_q_01_tab03:
     sel_question = st.selectbox(
         "Question categories for breakdown:",
-        ["All"] + [x for x in list(set(df["feedback_category"]))],
+        ["All"] + filter_lib.options(df_index, "feedback_category"),
     )
-    if sel_question == "All":
-        df_tab_03 = df_tab_03
-    else:
-        df_tab_03 = df_tab_03[df_tab_03["feedback_category"] == sel_question]
 with st_q_02_tab03:
     sel_building = st.selectbox(
         "Buildings for breakdown:",
-        ["All"] + [x for x in list(set(df_tab_03["building_name"]))],
+        ["All"] + filter_lib.options(
+            df_index,
+            "building_name",
+            filter_lib.select(df_index, feedback_category=sel_question),
+        ),
     )
-    if sel_building == "All":
-        df_tab_03 = df_tab_03
-    else:
-        df_tab_03 = df_tab_03[df_tab_03["building_name"] == sel_building]
 
 # > Selection
 sel_sentiment = st.multiselect(
@@ -75,95 +55,153 @@ sel_sentiment = st.multiselect(
     ["Positive", "Neutral", "Negative"],
     default=["Positive", "Neutral", "Negative"],
 )
-sel_sentiment = [x.lower() for x in sel_sentiment]
-df_tab_03 = df_tab_03[df_tab_03["sentiment"].isin(sel_sentiment)]
-
-# ## Hidden for advanced manipulation
-# with st.expander("Advanced filtering"):
-#     # > Sliders
-#     con_polarity = st.slider(
-#         "Polarity Score", min_value=-1.0, max_value=1.0, value=(-1.0, 1.0), step=0.1
-#     )
-#     df_tab_03 = df_tab_03[df_tab_03["polarity"] >= con_polarity[0]]
-#     df_tab_03 = df_tab_03[df_tab_03["polarity"] <= con_polarity[1]]
-
-#     con_subjectivity = st.slider(
-#         "Subjectivity Score",
-#         min_value=0.0,
-#         max_value=1.0,
-#         value=(0.0, 1.0),
-#         step=0.1,
-#     )
-#     df_tab_03 = df_tab_03[df_tab_03["subjectivity"] >= con_subjectivity[0]]
-#     df_tab_03 = df_tab_03[df_tab_03["subjectivity"] <= con_subjectivity[1]]
+
+## Hidden for advanced manipulation
+with st.expander("Advanced filtering"):
+    # > Sliders
+    # - at their full bounds the sliders do not filter (rows without a score stay in)
+    polarity_bounds = filter_lib.RANGE_BOUNDS['polarity']
+    con_polarity = st.slider(
+        "Polarity Score", min_value=polarity_bounds[0], max_value=polarity_bounds[1], value=polarity_bounds, step=0.1
+    )
+    subjectivity_bounds = filter_lib.RANGE_BOUNDS['subjectivity']
+    con_subjectivity = st.slider(
+        "Subjectivity Score",
+        min_value=subjectivity_bounds[0],
+        max_value=subjectivity_bounds[1],
+        value=subjectivity_bounds,
+        step=0.1,
+    )
+
+# > Search
+sel_search = st.text_input(
+    "Search feedback responses",
+    placeholder='e.g. lift, heat* or "communal areas"',
+)
+
+# > Query (served from the shared result cache when the same filters were used before)
+filter_spec = filter_lib.FilterSpec.create(
+    feedback_category=sel_question,
+    building_name=sel_building,
+    sentiment=sel_sentiment,
+    polarity=con_polarity,
+    subjectivity=con_subjectivity,
+    search=sel_search,
+)
+filter_result = filter_lib.query(df, filter_spec)
 
 # space
 st.write("#")
 
 # Details
+sel_scores = filter_result.percentages
 st_col_01_tab03, st_col_02_tab03, st_col_03_tab03 = st.columns(3)
 st_col_01_tab03.metric(
     "Positive Feedback Sentiment",
-    f'{feedback_lib.sentiment_percentages(df_tab_03,"positive")} %',
-    feedback_lib.sentiment_percentages(df_tab_03, "positive") - ori_score_pos,
+    f'{sel_scores.get("positive", 0)} %',
+    sel_scores.get("positive", 0) - ori_scores.get("positive", 0),
 )
 st_col_02_tab03.metric(
     "Neutral Feedback Sentiment",
-    f'{feedback_lib.sentiment_percentages(df_tab_03,"neutral")} %',
-    feedback_lib.sentiment_percentages(df_tab_03, "neutral") - ori_score_neu,
+    f'{sel_scores.get("neutral", 0)} %',
+    sel_scores.get("neutral", 0) - ori_scores.get("neutral", 0),
 )
 st_col_03_tab03.metric(
     "Negative Feedback Sentiment",
-    f'{feedback_lib.sentiment_percentages(df_tab_03,"negative")} %',
-    feedback_lib.sentiment_percentages(df_tab_03, "negative") - ori_score_neg,
+    f'{sel_scores.get("negative", 0)} %',
+    sel_scores.get("negative", 0) - ori_scores.get("negative", 0),
 )
 
 # > Data
-df_tab_03 = df_tab_03[
-    [
-        "resident_type",
-        "building_name",
-        "building_floor",
-        "resident_length",
-        "feedback_category",
-        "sentiment",
-        "free_text",
-    ]
-].rename(
-    columns={
-        "resident_type": "Resident",
-        "building_name": "Building Name",
-        "building_floor": "Building Floor",
-        "resident_length": "Length of Residency",
-        "feedback_category": "Category",
-        "free_text": "Feedback Response",
-        "sentiment": "Sentiment Category",
-    }
-)
+row_positions = filter_result.positions
+table_columns = [
+    "resident_type",
+    "building_name",
+    "building_floor",
+    "resident_length",
+    "feedback_category",
+    "sentiment",
+    "free_text",
+]
+table_headers = {
+    "resident_type": "Resident",
+    "building_name": "Building Name",
+    "building_floor": "Building Floor",
+    "resident_length": "Length of Residency",
+    "feedback_category": "Category",
+    "free_text": "Feedback Response",
+    "sentiment": "Sentiment Category",
+}
+
+# > Pagination
+st_page_01, st_page_02, st_page_03 = st.columns([1, 1, 4])
+with st_page_01:
+    page_size = st.selectbox("Rows per page", TABLE_PAGE_SIZES, index=1)
+n_pages = page_count(len(row_positions), page_size)
+with st_page_02:
+    page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+page_start, page_stop = page_bounds(len(row_positions), page_size, page)
+with st_page_03:
+    st.write("")
+    st.caption(
+        f"Showing responses {page_start + 1 if page_stop else 0}-{page_stop} of {len(row_positions)}"
+    )
+
+# - only the rows of the visible page are taken from the frame and styled
+df_tab_03 = df.iloc[
+    row_positions[page_start:page_stop], df.columns.get_indexer(table_columns)
+].rename(columns=table_headers)
 
 ## Output
-def color_col(col, pattern_map, default=""):
-    return np.select(
-        [col.str.contains(k, na=False) for k in pattern_map.keys()],
-        [f"background-color: {v}" for v in pattern_map.values()],
-        default=default,
-    ).astype(str)
-
-styler = df_tab_03.style.apply(
-    color_col,
-    pattern_map={
-        "neutral": "#C0F9FA",
-        "negative": "#FCCCCC",
-        "positive": "#92F294",
-    },
-    subset=["Sentiment Category"],
-)
-styler.hide_index()
-st.write(styler.to_html(), unsafe_allow_html=True)
+sentiment_colours = {
+    "neutral": "#C0F9FA",
+    "negative": "#FCCCCC",
+    "positive": "#92F294",
+}
+def color_col(col, colour_map, default=""):
+    styles = {k: f"background-color: {v}" for k, v in colour_map.items()}
+    return col.astype("object").map(styles).fillna(default).to_numpy()
+
+with profiling.span("render table", rows=len(df_tab_03)):
+    styler = df_tab_03.style.apply(
+        color_col,
+        colour_map=sentiment_colours,
+        subset=["Sentiment Category"],
+    )
+    styler.hide_index()
+    st.write(styler.to_html(), unsafe_allow_html=True)
 # st.dataframe(
 #     data = df_tab_03,
 #     use_container_width = True
 #     )
 
-## Add Footer
+## Export
+# - the file is only built when requested, then served from the shared export cache
+#   (per data version, filters, columns and format) on reruns and for other sessions
+st.write("#")
+st_export_01, st_export_02 = st.columns([1, 5])
+with st_export_01:
+    export_format = st.selectbox(
+        "Export format",
+        list(export_lib.EXPORT_FORMATS),
+        format_func=lambda export_key: export_lib.EXPORT_FORMATS[export_key].label,
+    )
+export_type = export_lib.EXPORT_FORMATS[export_format]
+export_data = export_lib.cached_export(df, filter_spec, table_columns, export_format)
+with st_export_02:
+    st.write("")
+    if export_data is None and st.button(f"Prepare export ({len(row_positions)} responses)"):
+        export_data = export_lib.export(
+            df, filter_spec, row_positions, table_columns, export_format, headers=table_headers
+        )
+    if export_data is not None:
+        st.download_button(
+            label=f"📁 Filtered Feedback (.{export_type.extension})",
+            data=export_data,
+            file_name=f"RIGRA_Survey_Feedback.{export_type.extension}",
+            mime=export_type.mime,
+        )
+
+## Debug panel (hidden unless enabled) and Footer
+profiling.render_panel()
 add_footer()
\ No newline at end of file
@@ -2,21 +2,12 @@
 
 ## Library Imports
 import streamlit as st
+from src import profiling
+from src.layout import render_header
 from src.util import add_footer
-from PIL import Image
 
-# Layout
-st.set_page_config(page_title='RIGRA Survey', layout='wide')
-
-# RIGRA logo
-logo_rigra = Image.open('./images/rigra_logo.png')
-image_col1, image_col2, image_col3 = st.columns(3)
-with image_col1:
-    st.write(' ')
-with image_col2:
-    st.image(logo_rigra)
-with image_col3:
-    st.write(' ')
+# Layout and RIGRA logo
+render_header()
 
     
 ## Title
@@ -41,5 +32,6 @@ with c3:
 st.write('')
 st.write('')
 st.write('')
-## Add Footer
+## Debug panel (hidden unless enabled) and Footer
+profiling.render_panel()
 add_footer()
\ No newline at end of file
@@ -0,0 +1,7 @@
+# pipeline
+"""
+Description
+- Offline NLP pipeline for the free-text survey responses
+- Scores sentiment and extracts topics, writing the sentiment and topics datasets read by the app
+- Not imported by the app itself; extra dependencies are listed in requirements-pipeline.txt
+"""
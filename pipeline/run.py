@@ -0,0 +1,86 @@
+# run.py
+"""
+Description
+- Command line entry point of the offline NLP pipeline
+- Reads raw free-text responses, scores new or changed texts, extracts topics and writes the
+  sentiment and topics datasets in the schemas the app expects
+
+Usage
+- python -m pipeline.run --responses responses.csv [--output-dir ./snapshots] [--cache-dir ./.pipeline_cache]
+                         [--batch-size 256] [--n-process 1]
+- If the output directory holds synced snapshots (see data_sources/sync.py) a new snapshot version is
+  published with the summary and feedback datasets carried over; otherwise the two Parquet files are written to it
+"""
+
+## Module Imports
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+from data_sources.schema import enforce_schema
+from data_sources.sync import current_version, sync, version_dir
+from pipeline import sentiment, topics
+
+'''
+Hard Coded Variables
+'''
+DEFAULT_CACHE_DIR = './.pipeline_cache'
+
+'''
+Supporting Functions
+'''
+# Raw responses from CSV or Parquet
+def read_responses(path: Path) -> pd.DataFrame:
+    path = Path(path)
+    if path.suffix == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+# Write the datasets, publishing a snapshot version when the output directory is a synced snapshot
+def write_outputs(frames: dict, output_dir: Path):
+    output_dir = Path(output_dir)
+    version = current_version(output_dir)
+    if version is not None:
+        for dataset in ('summary', 'feedback'):
+            frames[dataset] = pd.read_parquet(version_dir(output_dir, version) / f'{dataset}.parquet')
+        sync(output_dir, frames=frames)
+        return
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for dataset, df in frames.items():
+        df.to_parquet(output_dir / f'{dataset}.parquet', index=False)
+        print(f'Wrote {dataset} ({len(df)} rows)')
+
+'''
+Main Function
+'''
+def run(responses: pd.DataFrame, output_dir: Path, cache_dir: Path, batch_size: int, n_process: int):
+    cache = sentiment.read_cache(cache_dir)
+    df_sentiment, cache = sentiment.score_responses(responses, cache, batch_size=batch_size, n_process=n_process)
+    sentiment.write_cache(cache, cache_dir)
+    lemmas = sentiment.response_lemmas(df_sentiment, cache)
+    hashes = df_sentiment['free_text'].astype(str).map(sentiment.text_hash)
+    # Topics are updated with the responses not seen by previous runs only
+    states = topics.read_state(cache_dir)
+    df_topics, states = topics.update_topics(states, df_sentiment['feedback_category'], hashes, lemmas)
+    topics.write_state(states, cache_dir)
+    write_outputs(
+        {
+            'sentiment': enforce_schema(df_sentiment, 'sentiment'),
+            'topics': enforce_schema(df_topics, 'topics'),
+        },
+        output_dir,
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score RIGRA survey free-text responses and extract topics.')
+    parser.add_argument('--responses', type=Path, required=True, help='Raw responses (.csv or .parquet)')
+    parser.add_argument('--output-dir', type=Path, default=Path('./snapshots'), help='Snapshot or output directory')
+    parser.add_argument('--cache-dir', type=Path, default=Path(DEFAULT_CACHE_DIR), help='Score cache directory')
+    parser.add_argument('--batch-size', type=int, default=sentiment.DEFAULT_BATCH_SIZE, help='nlp.pipe batch size')
+    parser.add_argument('--n-process', type=int, default=1, help='Worker processes for nlp.pipe')
+    args = parser.parse_args(argv)
+    run(read_responses(args.responses), args.output_dir, args.cache_dir, args.batch_size, args.n_process)
+
+if __name__ == '__main__':
+    main()
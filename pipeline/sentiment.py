@@ -0,0 +1,133 @@
+# sentiment.py
+"""
+Description
+- Sentence-level sentiment scoring of free-text responses with spaCy (+ spacytextblob)
+- Texts are processed in batches with nlp.pipe (optionally over several worker processes)
+- Scores are cached on a hash of each text, so a rerun only scores new or changed responses
+"""
+
+## Module Imports
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pandas import DataFrame
+
+'''
+Hard Coded Variables
+'''
+# spaCy model used for tokenisation, sentence splitting and lemmas
+DEFAULT_MODEL = 'en_core_web_sm'
+# Polarity above / below which a response is positive / negative (neutral in between)
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+# nlp.pipe batch size
+DEFAULT_BATCH_SIZE = 256
+# Score cache file (one row per distinct text hash)
+CACHE_FILE = 'text_scores.parquet'
+CACHE_COLUMNS = ['text_hash', 'polarity', 'subjectivity', 'lemmas']
+
+# Columns of raw responses carried through to the sentiment dataset
+RESPONSE_COLUMNS = [
+    'response_id',
+    'resident_type',
+    'resident_length',
+    'building_name',
+    'building_floor',
+    'feedback_category',
+    'free_text',
+]
+
+'''
+Supporting Functions
+'''
+# Load the spaCy pipeline with the TextBlob sentiment component
+def load_nlp(model: str = DEFAULT_MODEL):
+    import spacy
+    try:
+        import spacytextblob.spacytextblob  # noqa: F401 (registers the "spacytextblob" factory)
+    except ImportError as error:
+        raise ImportError('The sentiment pipeline needs spacytextblob: pip install -r requirements-pipeline.txt') from error
+    nlp = spacy.load(model, disable=['ner'])
+    nlp.add_pipe('spacytextblob')
+    return nlp
+
+# Stable hash of a response text (whitespace-normalised)
+def text_hash(text: str) -> str:
+    return hashlib.sha1(' '.join(str(text).split()).encode('utf-8')).hexdigest()
+
+# Sentiment label from a polarity score
+def sentiment_label(polarity: np.ndarray) -> np.ndarray:
+    return np.select(
+        [polarity > POSITIVE_THRESHOLD, polarity < NEGATIVE_THRESHOLD],
+        ['positive', 'negative'],
+        default='neutral',
+    )
+
+# Read / write the score cache
+def read_cache(cache_dir: Path) -> DataFrame:
+    path = Path(cache_dir) / CACHE_FILE
+    if not path.exists():
+        return pd.DataFrame(columns=CACHE_COLUMNS)
+    return pd.read_parquet(path)
+
+def write_cache(cache: DataFrame, cache_dir: Path):
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    cache.to_parquet(Path(cache_dir) / CACHE_FILE, index=False)
+
+# Scores and lemmas of one processed document
+# - polarity/subjectivity are the mean over sentences, so long responses are not dominated by one clause
+def _score_doc(doc) -> tuple:
+    sentences = list(doc.sents) or [doc]
+    polarity = float(np.mean([sentence._.blob.polarity for sentence in sentences]))
+    subjectivity = float(np.mean([sentence._.blob.subjectivity for sentence in sentences]))
+    lemmas = [
+        token.lemma_.lower() for token in doc
+        if token.is_alpha and not token.is_stop and len(token) > 2
+    ]
+    return polarity, subjectivity, lemmas
+
+# Score texts that are not in the cache yet and return the updated cache
+def score_texts(texts: dict, cache: DataFrame, nlp=None, batch_size: int = DEFAULT_BATCH_SIZE, n_process: int = 1) -> DataFrame:
+    cached = set(cache['text_hash'])
+    missing = {digest: text for digest, text in texts.items() if digest not in cached}
+    if not missing:
+        return cache
+    nlp = nlp or load_nlp()
+    rows = {'text_hash': [], 'polarity': [], 'subjectivity': [], 'lemmas': []}
+    docs = nlp.pipe(missing.values(), batch_size=batch_size, n_process=n_process)
+    for digest, doc in zip(missing.keys(), docs):
+        polarity, subjectivity, lemmas = _score_doc(doc)
+        rows['text_hash'].append(digest)
+        rows['polarity'].append(polarity)
+        rows['subjectivity'].append(subjectivity)
+        rows['lemmas'].append(lemmas)
+    print(f'Scored {len(missing)} new texts ({len(texts) - len(missing)} cached)')
+    return pd.concat([cache, pd.DataFrame(rows)], ignore_index=True)
+
+'''
+Main Function
+'''
+# Sentiment dataset (layout of load_sentiment_data) from raw free-text responses
+# - responses: one row per response and feedback category with the RESPONSE_COLUMNS
+# - returns (sentiment dataset, updated score cache)
+def score_responses(responses: DataFrame, cache: DataFrame, nlp=None, batch_size: int = DEFAULT_BATCH_SIZE, n_process: int = 1):
+    responses = responses[RESPONSE_COLUMNS]
+    responses = responses[responses['free_text'].notna() & (responses['free_text'].astype(str).str.strip() != '')]
+    hashes = responses['free_text'].astype(str).map(text_hash)
+    cache = score_texts(dict(zip(hashes, responses['free_text'].astype(str))), cache, nlp, batch_size, n_process)
+    scores = cache.drop_duplicates('text_hash', keep='last').set_index('text_hash')
+    sentiment = responses.assign(
+        polarity=scores['polarity'].reindex(hashes).to_numpy(),
+        subjectivity=scores['subjectivity'].reindex(hashes).to_numpy(),
+    )
+    sentiment['sentiment'] = sentiment_label(sentiment['polarity'].to_numpy())
+    return sentiment.reset_index(drop=True), cache
+
+# Lemmas of each response (from the score cache), aligned with the rows of a sentiment dataset
+def response_lemmas(sentiment: DataFrame, cache: DataFrame) -> pd.Series:
+    lemmas = cache.drop_duplicates('text_hash', keep='last').set_index('text_hash')['lemmas']
+    hashes = sentiment['free_text'].astype(str).map(text_hash)
+    return pd.Series(lemmas.reindex(hashes).to_numpy(), index=sentiment.index)
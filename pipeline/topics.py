@@ -0,0 +1,207 @@
+# topics.py
+"""
+Description
+- Topic extraction from the lemmas of the free-text responses
+- Non-negative matrix factorisation of a sparse document-term matrix, per feedback category
+  (plus 'All' for every response), written in the feedback_category/topic/word layout
+- Topics are updated incrementally: each category keeps sufficient statistics (vocabulary, document
+  frequencies, A = W'X and B = W'W), so new responses update the topics without refitting the history
+  (online NMF); a full refit only happens when a category earns an extra topic
+"""
+
+## Module Imports
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pandas import DataFrame
+from scipy import sparse
+
+'''
+Hard Coded Variables
+'''
+# Category holding the topics of all feedback
+ALL_CATEGORY = 'All'
+# Maximum number of topics per category
+MAX_TOPICS = 5
+# Responses needed per topic (categories with fewer responses get fewer or no topics)
+MIN_DOCS_PER_TOPIC = 5
+# Top words listed for each topic
+TOP_WORDS = 5
+# NMF multiplicative-update iterations
+NMF_ITERATIONS = 200
+# Topic words must appear in at least this many responses
+MIN_TERM_DOCS = 2
+# Topic state file (in the pipeline cache directory)
+STATE_FILE = 'topic_state.pkl'
+_EPS = 1e-10
+
+'''
+Supporting Functions
+'''
+# Sparse document-term count matrix for lists of lemmas
+def document_term_matrix(documents, vocabulary: dict) -> sparse.csr_matrix:
+    rows, columns = [], []
+    for row, lemmas in enumerate(documents):
+        for lemma in lemmas:
+            column = vocabulary.setdefault(lemma, len(vocabulary))
+            rows.append(row)
+            columns.append(column)
+    values = np.ones(len(rows), dtype='float64')
+    return sparse.csr_matrix((values, (rows, columns)), shape=(len(documents), len(vocabulary)))
+
+# Scale each document to unit length, so long responses do not dominate the topics
+def normalise_rows(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1))).ravel()
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ matrix
+
+# Pad a matrix with extra columns (new vocabulary terms)
+def _pad_columns(matrix, n_columns: int, fill: float = 0.0):
+    if matrix.shape[1] >= n_columns:
+        return matrix
+    if sparse.issparse(matrix):
+        matrix = matrix.tocsr().copy()
+        matrix.resize((matrix.shape[0], n_columns))
+        return matrix
+    padding = np.full((matrix.shape[0], n_columns - matrix.shape[1]), fill)
+    return np.hstack([matrix, padding])
+
+# Number of topics for a number of responses
+def topic_count(n_documents: int) -> int:
+    return min(MAX_TOPICS, n_documents // MIN_DOCS_PER_TOPIC)
+
+# Document weights for fixed topics: W minimising ||X - W H|| (multiplicative updates)
+def fit_weights(matrix: sparse.csr_matrix, components: np.ndarray, iterations: int = NMF_ITERATIONS, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    weights = rng.random((matrix.shape[0], components.shape[0])) + _EPS
+    gram = components @ components.T
+    numerator = np.asarray(matrix @ components.T)
+    for _ in range(iterations):
+        weights *= numerator / (weights @ gram + _EPS)
+    return weights
+
+# Topics from the sufficient statistics: H minimising the accumulated loss (multiplicative updates)
+def fit_components(stat_a: np.ndarray, stat_b: np.ndarray, components: np.ndarray, iterations: int = NMF_ITERATIONS) -> np.ndarray:
+    components = components.copy()
+    for _ in range(iterations):
+        components *= stat_a / (stat_b @ components + _EPS)
+    return components
+
+# Full NMF: X (documents x terms) ~ W (documents x topics) H (topics x terms)
+def fit_nmf(matrix: sparse.csr_matrix, n_topics: int, iterations: int = NMF_ITERATIONS, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    weights = rng.random((matrix.shape[0], n_topics)) + _EPS
+    components = rng.random((n_topics, matrix.shape[1])) + _EPS
+    for _ in range(iterations):
+        components *= np.asarray(weights.T @ matrix) / (weights.T @ weights @ components + _EPS)
+        weights *= np.asarray(matrix @ components.T) / (weights @ (components @ components.T) + _EPS)
+    return weights, components
+
+# Top words of each topic as rows of the topics dataset
+# - doc_freq: optional number of responses containing each term (rare terms are skipped)
+def topic_rows(category: str, components: np.ndarray, vocabulary: dict, top_words: int = TOP_WORDS, doc_freq: np.ndarray = None) -> list:
+    terms = np.empty(len(vocabulary), dtype=object)
+    for term, column in vocabulary.items():
+        terms[column] = term
+    eligible = np.ones(len(terms), dtype=bool) if doc_freq is None else doc_freq[:len(terms)] >= MIN_TERM_DOCS
+    rows = []
+    for number, component in enumerate(components, start=1):
+        scores = np.where(eligible, component[:len(terms)], 0)
+        for column in np.argsort(scores)[::-1][:top_words]:
+            if scores[column] > 0:
+                rows.append({'feedback_category': category, 'topic': f'Topic {number}', 'word': terms[column]})
+    return rows
+
+'''
+Topic State
+'''
+# Empty state of one category
+def new_state() -> dict:
+    return {
+        'vocabulary': {},                               # term -> column
+        'doc_freq': np.zeros(0, dtype='int64'),         # responses containing each term
+        'matrix': sparse.csr_matrix((0, 0)),            # normalised document-term matrix (for refits)
+        'stat_a': None,                                 # A = W'X (topics x terms)
+        'stat_b': None,                                 # B = W'W (topics x topics)
+        'components': None,                             # H (topics x terms)
+        'seen': set(),                                  # hashes of responses already included
+    }
+
+# Add new responses to a category's state
+# - documents: {text hash: lemmas} (already-seen hashes are skipped)
+def update_state(state: dict, documents: dict) -> dict:
+    new = {digest: list(lemmas) for digest, lemmas in documents.items() if digest not in state['seen'] and lemmas is not None and len(lemmas)}
+    if not new:
+        return state
+    vocabulary = state['vocabulary']
+    counts = document_term_matrix(list(new.values()), vocabulary)
+    n_terms = len(vocabulary)
+    new_matrix = normalise_rows(counts)
+
+    ## Term statistics and the stored document-term matrix grow with the new responses only
+    doc_freq = np.zeros(n_terms, dtype='int64')
+    doc_freq[:len(state['doc_freq'])] = state['doc_freq']
+    doc_freq += np.asarray((counts > 0).sum(axis=0)).ravel()
+    matrix = sparse.vstack([_pad_columns(state['matrix'], n_terms), new_matrix]).tocsr() if state['matrix'].shape[0] else new_matrix
+    state.update(vocabulary=vocabulary, doc_freq=doc_freq, matrix=matrix)
+    state['seen'].update(new)
+
+    n_topics = topic_count(matrix.shape[0])
+    current_topics = 0 if state['components'] is None else state['components'].shape[0]
+    if n_topics == 0:
+        return state
+    if n_topics != current_topics:
+        ## Topic count changed: refit on the stored matrix and rebuild the statistics
+        weights, components = fit_nmf(matrix, n_topics)
+        state.update(stat_a=np.asarray(weights.T @ matrix), stat_b=weights.T @ weights, components=components)
+        return state
+
+    ## Online update: weights of the new responses only, then topics from the accumulated statistics
+    rng = np.random.default_rng(0)
+    components = _pad_columns(state['components'], n_terms)
+    components[:, state['stat_a'].shape[1]:] = rng.random((n_topics, n_terms - state['stat_a'].shape[1])) * 1e-3
+    weights = fit_weights(new_matrix, components)
+    stat_a = _pad_columns(state['stat_a'], n_terms) + np.asarray(weights.T @ new_matrix)
+    stat_b = state['stat_b'] + weights.T @ weights
+    state.update(stat_a=stat_a, stat_b=stat_b, components=fit_components(stat_a, stat_b, components))
+    return state
+
+# Read / write the topic state of every category
+def read_state(cache_dir: Path) -> dict:
+    path = Path(cache_dir) / STATE_FILE
+    if not path.exists():
+        return {}
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def write_state(states: dict, cache_dir: Path):
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    tmp_path = Path(cache_dir) / f'.{STATE_FILE}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(states, f)
+    tmp_path.replace(Path(cache_dir) / STATE_FILE)
+
+'''
+Main Function
+'''
+# Update the topic states with new responses and return (topics dataset, states)
+# - categories, hashes and lemmas are aligned: feedback_category, text hash and lemmas of each response
+def update_topics(states: dict, categories: pd.Series, hashes: pd.Series, lemmas: pd.Series):
+    groups = {ALL_CATEGORY: dict(zip(hashes, lemmas))}
+    for category, positions in pd.Series(np.arange(len(categories))).groupby(categories.to_numpy(), sort=True):
+        positions = positions.to_numpy()
+        groups[category] = dict(zip(hashes.iloc[positions], lemmas.iloc[positions]))
+    rows = []
+    for category, documents in groups.items():
+        state = update_state(states.setdefault(category, new_state()), documents)
+        if state['components'] is not None:
+            rows.extend(topic_rows(category, state['components'], state['vocabulary'], doc_freq=state['doc_freq']))
+    return pd.DataFrame(rows, columns=['feedback_category', 'topic', 'word']), states
+
+# Topics dataset (layout of load_topic_data) from scratch
+def extract_topics(categories: pd.Series, hashes: pd.Series, lemmas: pd.Series) -> DataFrame:
+    df_topics, _ = update_topics({}, categories, hashes, lemmas)
+    return df_topics
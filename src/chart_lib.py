@@ -0,0 +1,191 @@
+# chart_lib.py
+
+# Module Imports
+# - plotly.express and make_subplots are imported inside the builders: a cached figure never needs them,
+#   and plotly.graph_objects loads its figure classes lazily
+import plotly.graph_objects as go
+
+from pandas import DataFrame
+
+from data_sources.versioning import data_version
+from src import cube_lib, summary_lib
+from src.feedback_lib import score_buckets
+from src.profiling import profiled, span
+from src.resources import colour_palette, score_colours
+from src.util import get_or_build
+
+'''
+Figure Cache
+- Every chart depends only on the data version and its own parameters, so built figures are shared
+  across sessions and reruns; a rerun triggered by an unrelated widget costs a cache lookup
+- Cached figures are shared objects: do not update them after they are returned
+'''
+
+# Shared cache of figures by (chart, data version, parameters)
+FIGURE_CACHE = 'figures'
+FIGURE_CACHE_ENTRIES = 128
+# Shared cache of the per-building averages by data version (chart inputs, kept apart from the figures)
+AVERAGES_CACHE = 'building_averages'
+
+
+# Figure for a chart key, built on a miss
+def cached_figure(chart: str, version: str, params: tuple, build) -> go.Figure:
+    with span(f'chart {chart}'):
+        return get_or_build(FIGURE_CACHE, (chart, version) + tuple(params), build, FIGURE_CACHE_ENTRIES)
+
+
+'''
+Survey Summary Charts
+'''
+# Number of responses for one summary breakdown (resident_type, building_name, resident_length, ...)
+def summary_bar(df_summary: DataFrame, filter_type: str, title: str) -> go.Figure:
+    def _build():
+        import plotly.express as px
+        fig = px.bar(
+            summary_lib.filter_summary_data(df_summary, filter_type),
+            x="Description",
+            y="Number",
+            title=title,
+            log_y=False,
+        )
+        fig.update_layout(
+            showlegend=False,
+            xaxis_title=None,
+            yaxis_title="Number of Responses",
+            xaxis={"categoryorder": "category ascending"},
+            plot_bgcolor=colour_palette['background'],
+        )
+        fig.update_xaxes(showgrid = False)
+        fig.update_yaxes(showgrid = False)
+        return fig
+    return cached_figure('summary_bar', data_version(df_summary), (filter_type, title), _build)
+
+# Average feedback score per question category (all feedback)
+def questions_average_bar(feedback_cube: DataFrame) -> go.Figure:
+    def _build():
+        import plotly.express as px
+        df_plot = cube_lib.cube_questions_average(feedback_cube)
+        df_plot['feedback_colour'] = score_buckets(df_plot['feedback_score'])
+        fig = px.bar(
+            df_plot,
+            y = "question_category",
+            x = "feedback_score",
+            title = "Questions - Average Feedback",
+            color = 'feedback_colour',
+            log_y = False,
+            orientation = 'h',
+            color_discrete_map = score_colours
+        )
+        fig.update_layout(
+            showlegend = False,
+            yaxis_title = None,
+            xaxis_title = "Feedback Score (Average)",
+            yaxis = {"categoryorder": "category descending"},
+            plot_bgcolor = colour_palette['background'],
+            margin = dict(l = 200),
+            xaxis_range=[1,5]
+        )
+        fig.update_xaxes(showgrid = False)
+        fig.update_yaxes(showgrid = False)
+        return fig
+    return cached_figure('questions_average_bar', data_version(feedback_cube), (), _build)
+
+# Average feedback score and colour bucket per building and question category
+# - one grouped pass over the cube and one vectorised bucketing for all buildings
+@profiled()
+def building_averages(feedback_cube: DataFrame) -> DataFrame:
+    def _build():
+        df_average = cube_lib.cube_slice(feedback_cube, by=['building_name', 'question_category'])
+        df_average['feedback_colour'] = score_buckets(df_average['feedback_score'])
+        return df_average
+    return get_or_build(AVERAGES_CACHE, data_version(feedback_cube), _build)
+
+# Average feedback score per question category for one building
+def building_average_bar(feedback_cube: DataFrame, building: str) -> go.Figure:
+    def _build():
+        import plotly.express as px
+        df_building_average = building_averages(feedback_cube)
+        df_plot_filtered = df_building_average[df_building_average['building_name'] == building]
+        fig = px.bar(
+            df_plot_filtered,
+            y = "question_category",
+            x = "feedback_score",
+            color = "feedback_colour",
+            title = f"Questions - Average Feedback ({building})",
+            log_y = False,
+            orientation = 'h',
+            color_discrete_map = score_colours
+        )
+        fig.update_layout(
+            showlegend = False,
+            yaxis_title = None,
+            xaxis_title = "Feedback Score (Average)",
+            yaxis = {"categoryorder": "category descending"},
+            plot_bgcolor = colour_palette['background'],
+            margin = dict(l = 200),
+            xaxis_range=[1,5]
+        )
+        fig.update_xaxes(showgrid = False)
+        fig.update_yaxes(showgrid = False)
+        return fig
+    return cached_figure('building_average_bar', data_version(feedback_cube), (building,), _build)
+
+# Positive vs negative free-text sentiment per feedback category (diverging bars)
+def sentiment_diverging_bar(df_fb: DataFrame) -> go.Figure:
+    def _build():
+        from plotly.subplots import make_subplots
+        df_fb_positive = (
+            df_fb[df_fb["sentiment"] == "positive"]
+            .groupby(["feedback_category", "sentiment"], observed=True)
+            .size()
+            .reset_index(name="counts")
+            .rename(columns={"index": "positive"})
+        )
+        df_fb_negative = (
+            df_fb[df_fb["sentiment"] == "negative"]
+            .groupby(["feedback_category", "sentiment"], observed=True)
+            .size()
+            .reset_index(name="counts")
+            .rename(columns={"index": "negative"})
+        )
+        df_fb_negative["counts"] *= -1
+        fig = make_subplots(
+            rows=1, cols=2, specs=[[{}, {}]], shared_yaxes=True, horizontal_spacing=0
+        )
+        fig.append_trace(
+            go.Bar(
+                x=df_fb_negative.counts,
+                y=df_fb_negative.feedback_category,
+                orientation="h",
+                showlegend=True,
+                #text=df_fb_negative.counts,
+                name="Negative Feedback",
+                marker_color="#b20710",
+            ),
+            1,
+            1,
+        )
+        fig.append_trace(
+            go.Bar(
+                x=df_fb_positive.counts,
+                y=df_fb_positive.feedback_category,
+                orientation="h",
+                showlegend=True,
+                #text=df_fb_positive.counts,
+                name="Positive Feedback",
+                marker_color="green",
+            ),
+            1,
+            2,
+        )
+        fig.update_layout(
+            plot_bgcolor=colour_palette["background"],
+            margin=dict(l=200),
+        )
+        fig.update_xaxes(showgrid=False)
+        fig.update_yaxes(
+            showgrid=False, categoryorder="total ascending", ticksuffix=" ", showline=False
+        )
+        fig.update_traces(textposition="auto")
+        return fig
+    return cached_figure('sentiment_diverging_bar', data_version(df_fb), (), _build)
@@ -0,0 +1,109 @@
+# cube_lib.py
+
+# Module Imports
+import numpy as np
+import pandas as pd
+
+from pandas import DataFrame
+
+from data_sources.versioning import APPENDED_ROWS_ATTR, BASE_VERSION_ATTR, data_version, set_version
+from src.feedback_lib import NPS_BUCKETS, nps_buckets
+from src.profiling import profiled
+from src.util import get_cached, get_or_build
+
+'''
+Feedback Cube
+- Sum / count / bucket counts of feedback_score for every observed combination of the breakdown
+  dimensions, built once per data version
+- Charts and metrics slice the cube instead of the raw feedback rows, so their cost depends on the
+  number of dimension combinations rather than the number of responses
+'''
+
+# Breakdown dimensions
+CUBE_DIMENSIONS = ['question_category', 'resident_type', 'resident_length', 'building_name', 'building_floor']
+# Measures (all additive, so slices and incremental updates are plain sums)
+CUBE_MEASURES = ['rows', 'score_sum', 'score_count', 'positive', 'neutral', 'negative']
+# Shared cache of cubes by data version
+CUBE_CACHE = 'feedback_cube'
+
+
+# Build the cube from raw feedback rows
+def build_feedback_cube(df: DataFrame) -> DataFrame:
+    score = df['feedback_score'].astype('float')
+    buckets = nps_buckets(score)
+    measures = pd.DataFrame({
+        'rows': np.ones(len(df), dtype='int64'),
+        'score_sum': score.fillna(0).to_numpy(),
+        'score_count': score.notna().to_numpy().astype('int64'),
+        **{bucket: (buckets == code).astype('int64') for code, bucket in enumerate(NPS_BUCKETS)},
+    })
+    keys = [df[dimension].to_numpy() for dimension in CUBE_DIMENSIONS]
+    return (
+        measures.groupby(keys, dropna=False, sort=False)
+        .sum()
+        .rename_axis(CUBE_DIMENSIONS)
+        .reset_index()
+    )
+
+# Add new feedback rows to an existing cube
+def update_feedback_cube(cube: DataFrame, new_rows: DataFrame) -> DataFrame:
+    if new_rows.empty:
+        return cube
+    combined = pd.concat([cube, build_feedback_cube(new_rows)], ignore_index=True)
+    return combined.groupby(CUBE_DIMENSIONS, dropna=False, sort=False)[CUBE_MEASURES].sum().reset_index()
+
+# Cube for a loaded feedback frame (cached per data version, and stamped with the same version)
+# - after an incremental refresh the previous version's cube is updated with the appended rows only
+@profiled()
+def feedback_cube(df: DataFrame) -> DataFrame:
+    version = data_version(df)
+    def _build():
+        base_version = df.attrs.get(BASE_VERSION_ATTR)
+        appended_rows = df.attrs.get(APPENDED_ROWS_ATTR, 0)
+        base_cube = get_cached(CUBE_CACHE, base_version) if base_version else None
+        if base_cube is not None and appended_rows:
+            cube = update_feedback_cube(base_cube, df.iloc[-appended_rows:])
+        else:
+            cube = build_feedback_cube(df)
+        return set_version(cube, version)
+    return get_or_build(CUBE_CACHE, version, _build)
+
+
+'''
+Slicing
+'''
+# Filter the cube on dimension values, e.g. cube_filter(cube, building_name='Block A')
+def cube_filter(cube: DataFrame, **filters) -> DataFrame:
+    for dimension, value in filters.items():
+        if dimension not in CUBE_DIMENSIONS:
+            raise ValueError(f'Unknown cube dimension "{dimension}", expected one of {CUBE_DIMENSIONS}')
+        cube = cube[cube[dimension] == value]
+    return cube
+
+# Measures summed by some dimensions (or in total), with mean score and bucket percentages
+def cube_slice(cube: DataFrame, by=None, **filters) -> DataFrame:
+    cube = cube_filter(cube, **filters)
+    if by:
+        sliced = cube.groupby(by, observed=True, sort=True)[CUBE_MEASURES].sum().reset_index()
+    else:
+        sliced = cube[CUBE_MEASURES].sum().to_frame().T
+    sliced['feedback_score'] = sliced['score_sum'] / sliced['score_count'].replace(0, np.nan)
+    for bucket in NPS_BUCKETS:
+        sliced[f'{bucket}_pct'] = sliced[bucket] / sliced['rows'].replace(0, np.nan) * 100
+    return sliced
+
+# Average feedback score (same value as feedback_lib.feedback_all_mean on the matching rows)
+def cube_mean(cube: DataFrame, **filters) -> float:
+    return round(float(cube_slice(cube, **filters)['feedback_score'].iloc[0]), 1)
+
+# Percentage of positive / neutral / negative feedback (same values as feedback_lib.feedback_all_nps_percentages)
+def cube_nps_percentages(cube: DataFrame, **filters) -> dict:
+    total = cube_slice(cube, **filters).iloc[0]
+    return {
+        bucket: int(round(total[f'{bucket}_pct'], 0))
+        for bucket in NPS_BUCKETS
+    }
+
+# Average score per question category (same layout as feedback_lib.feedback_questions_average)
+def cube_questions_average(cube: DataFrame, **filters) -> DataFrame:
+    return cube_slice(cube, by=['question_category'], **filters)[['question_category', 'feedback_score']].copy()
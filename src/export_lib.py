@@ -0,0 +1,231 @@
+# export_lib.py
+"""
+Description
+- Downloads of survey data in CSV, Parquet and Excel (.xlsx)
+- Filtered exports are built on request and cached per (data version, filter spec, columns, format),
+  so a download button costs nothing until it is used and repeat downloads are served from memory
+  (the cache is bounded by the total size of the files; a file larger than the budget is not kept)
+- Rows are written in chunks straight into the output buffer, so an export never holds more than
+  one chunk of converted rows next to the finished file
+- The static survey workbook (exports/) is regenerated from the active snapshot
+
+Usage
+- python -m src.export_lib [--snapshot-dir ./snapshots] [--output exports/RIGRA_Survey_Winter2022_Summary.xlsx]
+"""
+
+# Module Imports
+import argparse
+import io
+import os
+from datetime import date
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from pandas import DataFrame
+
+from data_sources import DATASETS
+from data_sources.schema import enforce_schema
+from data_sources.sync import current_version, version_dir
+from data_sources.versioning import data_version
+from src import summary_lib
+from src.profiling import profiled
+from src.util import get_cached, get_or_build
+
+'''
+Hard Coded Variables
+'''
+class ExportFormat(NamedTuple):
+    label: str
+    mime: str
+    extension: str
+
+
+EXPORT_FORMATS = {
+    'csv': ExportFormat('CSV', 'text/csv', 'csv'),
+    'parquet': ExportFormat('Parquet', 'application/vnd.apache.parquet', 'parquet'),
+    'xlsx': ExportFormat('Excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+# Shared cache of export files, bounded by their total size
+EXPORT_CACHE = 'exports'
+EXPORT_CACHE_BYTES = 128 * 1024 * 1024
+# Rows converted and written per chunk
+CHUNK_ROWS = 50_000
+# Static survey workbook
+WORKBOOK_PATH = './exports/RIGRA_Survey_Winter2022_Summary.xlsx'
+WORKBOOK_TITLE = 'RIGRA Winter Survey 2022 - Data'
+# Summary Type -> label in the published "Responses" sheet (the floor breakdown and the Contactable total
+# are not part of the published sheet and are left out)
+WORKBOOK_RESPONSE_TYPES = {
+    'all': 'All Responses',
+    'resident_type': 'Resident Type',
+    'building_name': 'Building Name',
+    'resident_length': 'Resident Length (Years)',
+}
+# Workbook sheet -> (dataset, {column: header})
+WORKBOOK_SHEETS = {
+    'Responses': ('summary', {'Description': 'Description', 'Type': 'Type', 'Number': 'Number', 'Percentage': 'Percentage'}),
+    'Feedback - Scores': ('feedback', {
+        'building_name': 'Building Name',
+        'question': 'Question',
+        'question_category': 'Question (Category)',
+        'feedback_score': 'Feedback Score (1-5)',
+    }),
+    'Feedback - Sentiment': ('sentiment', {
+        'building_name': 'Building Name',
+        'feedback_category': 'Feedback Category',
+        'free_text': 'Feedback Text (Cleaned)',
+        'sentiment': 'Feedback Sentiment',
+    }),
+    'Feedback - Topics': ('topics', {
+        'topic': 'Topic Number',
+        'word': 'Topic - Word',
+        'feedback_category': 'Feedback Question Category',
+    }),
+}
+
+'''
+Supporting Functions
+'''
+# Selected rows and columns of a frame in chunks, renamed to headers (always at least one chunk)
+def iter_chunks(df: DataFrame, positions: np.ndarray = None, columns: list = None, headers: dict = None, chunk_rows: int = CHUNK_ROWS) -> Iterator[DataFrame]:
+    positions = np.arange(len(df)) if positions is None else np.asarray(positions)
+    column_positions = df.columns.get_indexer(columns) if columns is not None else np.arange(df.shape[1])
+    for start in range(0, max(len(positions), 1), chunk_rows):
+        chunk = df.iloc[positions[start:start + chunk_rows], column_positions]
+        yield chunk.rename(columns=headers) if headers else chunk
+
+# CSV: header with the first chunk, then rows
+def write_csv(chunks: Iterator[DataFrame], buffer: io.BytesIO):
+    text = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
+    for number, chunk in enumerate(chunks):
+        chunk.to_csv(text, header=number == 0, index=False)
+    text.flush()
+    text.detach()
+
+# Parquet: one row group per chunk
+def write_parquet(chunks: Iterator[DataFrame], buffer: io.BytesIO):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=False, schema=writer.schema if writer else None)
+        if writer is None:
+            writer = pq.ParquetWriter(buffer, table.schema)
+        writer.write_table(table)
+    writer.close()
+
+# Cell values of a chunk (missing values as empty cells)
+def _rows(chunk: DataFrame) -> Iterator[tuple]:
+    values = chunk.astype('object')
+    return values.where(values.notna(), None).itertuples(index=False, name=None)
+
+# Excel: one sheet per {sheet name: chunks}, streamed with a write-only workbook
+# - cover: optional lines written to a first "Cover" sheet
+def write_xlsx(sheets: dict, buffer: io.BytesIO, cover: list = None):
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    if cover:
+        sheet = workbook.create_sheet('Cover')
+        for line in cover:
+            sheet.append([line])
+    for name, chunks in sheets.items():
+        sheet = workbook.create_sheet(name)
+        for number, chunk in enumerate(chunks):
+            if number == 0:
+                sheet.append([str(column) for column in chunk.columns])
+            for row in _rows(chunk):
+                sheet.append(row)
+    workbook.save(buffer)
+
+# File contents of rows of a frame in one of the EXPORT_FORMATS
+# - the buffer is closed once its bytes are taken, so getvalue() hands over the buffer's own bytes
+#   object instead of leaving a second copy of the file behind
+def export_bytes(df: DataFrame, positions: np.ndarray, columns: list, export_format: str, headers: dict = None, chunk_rows: int = CHUNK_ROWS) -> bytes:
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Unknown export format "{export_format}", expected one of {sorted(EXPORT_FORMATS)}')
+    buffer = io.BytesIO()
+    chunks = iter_chunks(df, positions, columns, headers, chunk_rows)
+    if export_format == 'csv':
+        write_csv(chunks, buffer)
+    elif export_format == 'parquet':
+        write_parquet(chunks, buffer)
+    else:
+        write_xlsx({'Feedback': chunks}, buffer)
+    data = buffer.getvalue()
+    buffer.close()
+    return data
+
+'''
+Filtered Exports
+'''
+def _export_key(df: DataFrame, spec, columns: list, export_format: str) -> tuple:
+    return (data_version(df), spec, tuple(columns), export_format)
+
+# Export built earlier for the same data version, filter spec, columns and format (None if not built yet)
+def cached_export(df: DataFrame, spec, columns: list, export_format: str) -> bytes:
+    return get_cached(EXPORT_CACHE, _export_key(df, spec, columns, export_format), max_bytes=EXPORT_CACHE_BYTES)
+
+# Export of the rows matching a filter spec (built on a miss)
+# - positions: the rows of the spec's result, in the order they are shown
+@profiled()
+def export(df: DataFrame, spec, positions: np.ndarray, columns: list, export_format: str, headers: dict = None) -> bytes:
+    return get_or_build(
+        EXPORT_CACHE,
+        _export_key(df, spec, columns, export_format),
+        lambda: export_bytes(df, positions, columns, export_format, headers),
+        max_bytes=EXPORT_CACHE_BYTES,
+    )
+
+'''
+Survey Workbook
+'''
+# Write the survey workbook from {dataset: DataFrame} (replaced atomically)
+def write_workbook(frames: dict, path: Path = WORKBOOK_PATH):
+    path = Path(path)
+    summary = summary_lib.build_summary_data(frames['feedback'])
+    summary_types = summary['Type'].astype('object')
+    published = summary_types.isin(WORKBOOK_RESPONSE_TYPES) & ((summary_types != 'all') | (summary['Description'] == 'Responses'))
+    summary = summary[published].assign(Type=summary_types[published].map(WORKBOOK_RESPONSE_TYPES))
+    responses = int(summary.loc[summary['Description'] == 'Responses', 'Number'].iloc[0])
+    frames = dict(frames, summary=summary.assign(Percentage=summary['Number'].astype('float') / responses))
+    sheets = {
+        name: iter_chunks(frames[dataset], columns=list(headers), headers=headers)
+        for name, (dataset, headers) in WORKBOOK_SHEETS.items()
+    }
+    cover = [
+        WORKBOOK_TITLE,
+        'This workbook contains the data (cleaned and processed) from the RIGRA winter survey.',
+        'All feedback can be filtered using the filter dropdowns on each column.',
+        f'Created: {date.today().isoformat()}',
+    ]
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    with open(tmp_path, 'wb') as f:
+        write_xlsx(sheets, f, cover)
+    os.replace(tmp_path, path)
+    print(f'Wrote {path}')
+
+# Datasets of the active snapshot
+def read_snapshot(snapshot_dir: Path) -> dict:
+    version = current_version(snapshot_dir)
+    directory = Path(snapshot_dir) if version is None else version_dir(snapshot_dir, version)
+    return {
+        dataset: enforce_schema(pd.read_parquet(directory / f'{dataset}.parquet'), dataset)
+        for dataset in DATASETS if (directory / f'{dataset}.parquet').exists()
+    }
+
+'''
+Command Line
+'''
+def main(argv=None):
+    from data_sources.local_files import snapshot_dir
+    parser = argparse.ArgumentParser(description='Regenerate the RIGRA survey workbook from the active snapshot.')
+    parser.add_argument('--snapshot-dir', type=Path, default=None, help='Snapshot directory (default: RIGRA_SNAPSHOT_DIR or ./snapshots)')
+    parser.add_argument('--output', type=Path, default=Path(WORKBOOK_PATH), help='Workbook path')
+    args = parser.parse_args(argv)
+    write_workbook(read_snapshot(args.snapshot_dir or snapshot_dir()), args.output)
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,13 @@
 # feedback_lib.py
 
 # Module Imports
+import numpy as np
 import pandas as pd
 
 from pandas import DataFrame
 
+from src.profiling import profiled
+
 '''
 Filtering Functions
 '''
@@ -36,31 +39,69 @@ Summarise Data
 def feedback_all_mean(df: DataFrame) -> int:
     return round(df["feedback_score"].mean(),1)
 
+# Score buckets: negative (< 3), neutral (3 to 4 inclusive), positive (> 4)
+NPS_BUCKETS = ['negative', 'neutral', 'positive']
+# Bucket code for a missing score
+NPS_MISSING = len(NPS_BUCKETS)
+# Upper edges for np.digitize; nextafter(4) keeps a score of exactly 4 neutral
+_NPS_BINS = np.array([3.0, np.nextafter(4.0, np.inf)])
+
+# Bucket code per score (0 negative, 1 neutral, 2 positive, 3 missing)
+def nps_buckets(scores) -> np.ndarray:
+    scores = pd.Series(scores).astype('float').to_numpy()
+    buckets = np.digitize(scores, _NPS_BINS)
+    buckets[np.isnan(scores)] = NPS_MISSING
+    return buckets
+
+# Bucket label per score ('negative', 'neutral', 'positive'; None for a missing score)
+# - used for individual scores and for averages, so charts and metrics share one definition
+def score_buckets(scores) -> np.ndarray:
+    labels = np.array(NPS_BUCKETS + [None], dtype=object)
+    return labels[nps_buckets(scores)]
+
+# Counts and percentages - Positive, Neutral, Negative - in one pass over the scores
+# - by: optional column (or list of columns) to split the results by, e.g. 'building_name'
+# - percentages are of all rows in the group (including rows without a score)
+@profiled()
+def feedback_nps(df: DataFrame, by=None) -> DataFrame:
+    buckets = nps_buckets(df['feedback_score'])
+    if by is None:
+        codes = np.zeros(len(df), dtype='int64')
+        index = pd.RangeIndex(1)
+    else:
+        grouper = df.groupby(by, observed=True, sort=True)
+        codes = grouper.ngroup().to_numpy(dtype='float')
+        index = grouper.size().index
+        # rows with a missing group key are not part of any group
+        keep = codes >= 0
+        codes, buckets = codes[keep].astype('int64'), buckets[keep]
+    n_buckets = NPS_MISSING + 1
+    counts = np.bincount(codes * n_buckets + buckets, minlength=len(index) * n_buckets)
+    counts = counts.reshape(len(index), n_buckets)
+    totals = counts.sum(axis=1)
+    result = pd.DataFrame(counts[:, :NPS_MISSING], columns=NPS_BUCKETS, index=index)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for position, bucket in enumerate(NPS_BUCKETS):
+            result[f'{bucket}_pct'] = counts[:, position] / totals * 100
+    result['responses'] = totals
+    return result if by is None else result.reset_index()
+
 # Counts - All - Positive, Neutral, Negative
 def feedback_all_nps_counts(df: DataFrame, nps_type: str) -> int:
-    if nps_type.lower() == 'positive':
-        response_count = len(df[df['feedback_score'] > 4])
-    elif nps_type.lower() == 'neutral':
-        response_count = len(df[df['feedback_score'].between(3, 4)])
-    elif nps_type.lower() == 'negative':
-        response_count = len(df[df['feedback_score'] < 3])
-    return response_count
+    return int(feedback_nps(df)[nps_type.lower()].iloc[0])
 
 # Percentages - All - Positive, Neutral, Negative
 def feedback_all_nps_percentages(df: DataFrame, nps_type: str) -> int:
-    max_response = len(df['response_id'])
-    if nps_type.lower() == 'positive':
-        response_count = feedback_all_nps_counts(df, nps_type)
-    elif nps_type.lower() == 'neutral':
-        response_count = feedback_all_nps_counts(df, nps_type)
-    elif nps_type.lower() == 'negative':
-        response_count = feedback_all_nps_counts(df, nps_type)
-    
-    return int(round((response_count/max_response) * 100, 0))
+    return int(round(feedback_nps(df)[f'{nps_type.lower()}_pct'].iloc[0], 0))
 
 # Questions
 def feedback_questions_average(df: DataFrame) -> DataFrame:
-    return df.groupby(['question_category']).mean().reset_index()
+    return (
+        df.groupby(['question_category'], observed=True)['feedback_score']
+        .mean()
+        .astype('float')
+        .reset_index()
+    )
 
 
 '''
@@ -0,0 +1,210 @@
+# filter_lib.py
+
+# Module Imports
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from pandas import DataFrame
+
+from data_sources.versioning import data_version
+from src import search_lib
+from src.profiling import profiled
+from src.util import get_or_build
+
+'''
+Bitmap Filter Index
+- One packed bitmap (1 bit per row) for every value of each filter column, built once per data version
+- Any combination of filters is answered by AND-ing (and OR-ing, for multi-selects) bitmaps,
+  then the matching rows are taken from the frame by position in a single step
+- Numeric range filters use presorted column values: a range is two binary searches (searchsorted),
+  and the rows between them become a bitmap to intersect with the other filters
+'''
+
+# Columns the Feedback Explorer filters on
+FILTER_COLUMNS = ['feedback_category', 'building_name', 'sentiment']
+# Numeric columns with range filters and the full (low, high) bounds of their sliders
+RANGE_BOUNDS = {'polarity': (-1.0, 1.0), 'subjectivity': (0.0, 1.0)}
+RANGE_COLUMNS = list(RANGE_BOUNDS)
+# Shared cache of indexes by data version
+INDEX_CACHE = 'filter_index'
+# Shared cache of filter results by (data version, filter spec), bounded by the size of the row positions
+RESULT_CACHE = 'filter_results'
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+# Number of set bits in every byte value
+_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype='int64')
+
+
+class FilterIndex(NamedTuple):
+    n_rows: int
+    # column -> {value: packed bitmap}
+    bitmaps: Dict[str, Dict[object, np.ndarray]]
+    # column -> sorted list of values
+    values: Dict[str, List[object]]
+    # range column -> (sorted values, row positions in that order); missing values are left out
+    ranges: Dict[str, Tuple[np.ndarray, np.ndarray]]
+
+
+# Build the index for a frame
+def build_filter_index(df: DataFrame, columns=FILTER_COLUMNS, range_columns=RANGE_COLUMNS) -> FilterIndex:
+    bitmaps, values, ranges = {}, {}, {}
+    for column in columns:
+        codes, uniques = df[column].factorize(sort=True)
+        bitmaps[column] = {
+            value: np.packbits(codes == code)
+            for code, value in enumerate(uniques)
+        }
+        values[column] = list(uniques)
+    for column in range_columns:
+        if column not in df.columns:
+            continue
+        # values keep the column's own float dtype (float32 in the schema), see select_range
+        series = df[column]
+        dtype = series.dtype if isinstance(series.dtype, np.dtype) and series.dtype.kind == 'f' else np.dtype('float64')
+        column_values = series.to_numpy(dtype=dtype, na_value=np.nan)
+        order = np.argsort(column_values, kind='stable')
+        order = order[~np.isnan(column_values[order])]
+        ranges[column] = (column_values[order], order)
+    return FilterIndex(len(df), bitmaps, values, ranges)
+
+# Index for a loaded frame (cached per data version)
+@profiled()
+def filter_index(df: DataFrame) -> FilterIndex:
+    return get_or_build(INDEX_CACHE, data_version(df), lambda: build_filter_index(df))
+
+
+'''
+Queries
+'''
+# Bitmap with every row selected
+def all_rows(index: FilterIndex) -> np.ndarray:
+    return np.packbits(np.ones(index.n_rows, dtype=bool))
+
+# Bitmap of rows with a range column value in [low, high]
+# - bounds are cast to the stored dtype first, so a float32 0.3 still matches a slider bound of 0.3
+def select_range(index: FilterIndex, column: str, low: float, high: float) -> np.ndarray:
+    sorted_values, order = index.ranges[column]
+    low, high = sorted_values.dtype.type(low), sorted_values.dtype.type(high)
+    start = np.searchsorted(sorted_values, low, side='left')
+    stop = np.searchsorted(sorted_values, high, side='right')
+    mask = np.zeros(index.n_rows, dtype=bool)
+    mask[order[start:stop]] = True
+    return np.packbits(mask)
+
+# Whether a range spans the slider's full bounds (no filter, so rows with a missing value are kept too)
+def _full_range(column: str, low: float, high: float) -> bool:
+    bounds = RANGE_BOUNDS.get(column)
+    return bounds is not None and low <= bounds[0] and high >= bounds[1]
+
+# Bitmap of rows matching the filters
+# - each filter is a single value, a list of values (any of them), or None / 'All' for no filter
+# - ranges: optional {range column: (low, high)}, both ends inclusive; a range at its full RANGE_BOUNDS is skipped
+def select(index: FilterIndex, ranges: dict = None, **filters) -> np.ndarray:
+    selection = all_rows(index)
+    for column, (low, high) in (ranges or {}).items():
+        if column in index.ranges and not _full_range(column, low, high):
+            selection &= select_range(index, column, low, high)
+    for column, wanted in filters.items():
+        if wanted is None or (isinstance(wanted, str) and wanted == 'All'):
+            continue
+        column_bitmaps = index.bitmaps[column]
+        wanted = [wanted] if isinstance(wanted, str) or not hasattr(wanted, '__iter__') else wanted
+        matches = np.zeros_like(selection)
+        for value in wanted:
+            if value in column_bitmaps:
+                matches |= column_bitmaps[value]
+        selection &= matches
+    return selection
+
+# Number of selected rows
+def count(selection: np.ndarray) -> int:
+    return int(_POPCOUNT[selection].sum())
+
+# Row positions of a selection (for DataFrame.iloc)
+def positions(index: FilterIndex, selection: np.ndarray) -> np.ndarray:
+    return np.flatnonzero(np.unpackbits(selection, count=index.n_rows))
+
+# Values of a column that occur in the selected rows (e.g. buildings left after picking a category)
+def options(index: FilterIndex, column: str, selection: np.ndarray = None) -> list:
+    if selection is None:
+        return list(index.values[column])
+    return [
+        value for value in index.values[column]
+        if (index.bitmaps[column][value] & selection).any()
+    ]
+
+# Percentage of the selected rows with each value of a column, e.g. {'positive': 40, ...}
+# - same rounding as feedback_lib.sentiment_percentages
+def percentages(index: FilterIndex, column: str, selection: np.ndarray) -> dict:
+    total = count(selection)
+    return {
+        value: int(round(count(bitmap & selection) / total * 100, 0)) if total else 0
+        for value, bitmap in index.bitmaps[column].items()
+    }
+
+
+
+'''
+Filter Specs
+- The Feedback Explorer query as a hashable value; results are shared across sessions in a bounded
+  LRU keyed by (data version, spec), so popular combinations are served straight from the cache
+'''
+
+class FilterSpec(NamedTuple):
+    feedback_category: str = 'All'
+    building_name: str = 'All'
+    # sentiments to include (sorted)
+    sentiment: Tuple[str, ...] = ('negative', 'neutral', 'positive')
+    # inclusive (low, high) ranges
+    polarity: Tuple[float, float] = RANGE_BOUNDS['polarity']
+    subjectivity: Tuple[float, float] = RANGE_BOUNDS['subjectivity']
+    # full-text search query (see search_lib)
+    search: str = ''
+
+    # Spec with normalised values, so equivalent widget states share one cache entry
+    @classmethod
+    def create(cls, feedback_category='All', building_name='All', sentiment=('negative', 'neutral', 'positive'), polarity=RANGE_BOUNDS['polarity'], subjectivity=RANGE_BOUNDS['subjectivity'], search=''):
+        return cls(
+            feedback_category,
+            building_name,
+            tuple(sorted(value.lower() for value in sentiment)),
+            (float(polarity[0]), float(polarity[1])),
+            (float(subjectivity[0]), float(subjectivity[1])),
+            ' '.join(search.split()),
+        )
+
+
+class FilterResult(NamedTuple):
+    # row positions of the matching rows (search results keep their ranking)
+    positions: np.ndarray
+    # percentage of the matching rows per sentiment
+    percentages: Dict[str, int]
+
+
+# Rows and sentiment percentages matching a spec
+def run_query(df: DataFrame, index: FilterIndex, spec: FilterSpec) -> FilterResult:
+    selection = select(
+        index,
+        ranges={'polarity': spec.polarity, 'subjectivity': spec.subjectivity},
+        feedback_category=spec.feedback_category,
+        building_name=spec.building_name,
+        sentiment=list(spec.sentiment),
+    )
+    if spec.search:
+        search_positions = search_lib.search(search_lib.search_index(df), spec.search)
+        selection &= search_lib.positions_bitmap(index.n_rows, search_positions)
+        selected = np.unpackbits(selection, count=index.n_rows).astype(bool)
+        row_positions = search_positions[selected[search_positions]]
+    else:
+        row_positions = positions(index, selection)
+    return FilterResult(row_positions, percentages(index, 'sentiment', selection))
+
+# Result for a loaded frame and spec (cached per data version and spec; treat as read-only)
+@profiled()
+def query(df: DataFrame, spec: FilterSpec) -> FilterResult:
+    return get_or_build(
+        RESULT_CACHE,
+        (data_version(df), spec),
+        lambda: run_query(df, filter_index(df), spec),
+        max_bytes=RESULT_CACHE_BYTES,
+    )
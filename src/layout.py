@@ -0,0 +1,34 @@
+# layout.py
+
+# Module Imports
+import streamlit as st
+
+from src.profiling import start_run
+from src.util import static_bytes
+
+'''
+Page Layout
+- Shared page setup and header; the logo is read once per process and passed to st.image as bytes
+'''
+
+# Page title shown in the browser tab
+PAGE_TITLE = 'RIGRA Survey'
+# RIGRA logo (relative to the app root)
+LOGO_PATH = './images/rigra_logo.png'
+
+
+# Logo file contents (cached per process)
+def logo_bytes() -> bytes:
+    return static_bytes(LOGO_PATH)
+
+# Page config and the centred RIGRA logo (must be the first Streamlit call of a page; starts the rerun's profiling spans)
+def render_header(page_title: str = PAGE_TITLE):
+    st.set_page_config(page_title=page_title, layout='wide')
+    start_run()
+    image_col1, image_col2, image_col3 = st.columns(3)
+    with image_col1:
+        st.write(' ')
+    with image_col2:
+        st.image(logo_bytes())
+    with image_col3:
+        st.write(' ')
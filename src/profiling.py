@@ -0,0 +1,157 @@
+# profiling.py
+
+# Module Imports
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from data_sources import get_setting
+
+'''
+Profiling Spans
+- span() / @profiled time a block or a function and record wall time, rows processed and whether
+  the shared cache it used was a hit or a miss
+- With profiling enabled (RIGRA_PROFILING=1, or profiling under [data_source] in secrets.toml) every span
+  is written as one JSON line to stderr by the "rigra.profiling" logger
+- Spans of a rerun are kept for the sidebar debug panel when profiling is enabled or ?debug=true is in the URL
+- With both off a span only takes the two clock readings: no JSON is built and nothing is stored
+'''
+
+logger = logging.getLogger('rigra.profiling')
+
+# Session state key holding the spans of the current rerun
+SESSION_KEY = '_profiling_spans'
+# Query parameter that shows the debug panel
+DEBUG_PARAM = 'debug'
+_TRUE = ('1', 'true', 'yes', 'on')
+
+# Active spans of each thread (innermost last)
+_local = threading.local()
+
+
+# Whether profiling is enabled for the process (read once; attaches the JSON log handler)
+@functools.lru_cache(maxsize=None)
+def profiling_enabled() -> bool:
+    if str(get_setting('profiling', '')).lower() not in _TRUE:
+        return False
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return True
+
+
+class Span:
+    __slots__ = ('name', 'rows', 'cache', 'wall_ms')
+
+    def __init__(self, name: str, rows: int = None):
+        self.name = name
+        # rows processed (set inside the block if not known up front)
+        self.rows = rows
+        # 'hit' / 'miss' of the first shared cache lookup in the span (None if no cache was used)
+        self.cache = None
+        self.wall_ms = None
+
+    def as_dict(self) -> dict:
+        return {'span': self.name, 'wall_ms': round(self.wall_ms, 3), 'rows': self.rows, 'cache': self.cache}
+
+
+'''
+Supporting Functions
+'''
+def _active() -> list:
+    if not hasattr(_local, 'spans'):
+        _local.spans = []
+    return _local.spans
+
+# Rows of a DataFrame / array argument (None for anything else)
+def _row_count(value):
+    shape = getattr(value, 'shape', None)
+    return int(shape[0]) if shape else None
+
+# Log a finished span and keep it for the current rerun (only the parts that are enabled)
+def _record(span: Span):
+    log = profiling_enabled()
+    records = st.session_state.get(SESSION_KEY) if get_script_run_ctx() is not None else None
+    if not log and records is None:
+        return
+    record = dict(span.as_dict(), thread=threading.current_thread().name)
+    if log:
+        logger.info(json.dumps(dict(record, ts=round(time.time(), 3))))
+    if records is not None:
+        records.append(record)
+
+# Mark the innermost active span with a cache hit or miss (the first lookup in a span wins,
+# so the builds a miss triggers do not overwrite it)
+def mark_cache(hit: bool):
+    spans = _active()
+    if spans and spans[-1].cache is None:
+        spans[-1].cache = 'hit' if hit else 'miss'
+
+'''
+Main Functions
+'''
+# Time a block: `with span('load feedback') as s: ...; s.rows = len(df)`
+@contextmanager
+def span(name: str, rows: int = None):
+    current = Span(name, rows)
+    spans = _active()
+    spans.append(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.wall_ms = (time.perf_counter() - start) * 1000
+        spans.pop()
+        _record(current)
+
+# Time every call of a function; rows default to the length of the first (DataFrame / array) argument
+def profiled(name: str = None):
+    def decorator(func):
+        span_name = name or f'{func.__module__.rsplit(".", 1)[-1]}.{func.__name__}'
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, _row_count(args[0]) if args else None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Start a new rerun (drops the spans of the previous one; spans are only kept when the panel is shown)
+def start_run():
+    if get_script_run_ctx() is not None:
+        st.session_state[SESSION_KEY] = [] if enabled() else None
+
+# Whether the debug panel is shown
+def enabled() -> bool:
+    if profiling_enabled():
+        return True
+    values = st.experimental_get_query_params().get(DEBUG_PARAM, [])
+    return any(value.lower() in _TRUE for value in values)
+
+# Sidebar panel with the spans of this rerun (hidden unless enabled)
+def render_panel():
+    if not enabled():
+        return
+    records = list(st.session_state.get(SESSION_KEY) or [])
+    with st.sidebar.expander('Profiling', expanded=True):
+        if not records:
+            st.caption('No spans recorded')
+            return
+        st.caption(f'{len(records)} spans in this rerun')
+        st.table([
+            {
+                'Span': record['span'],
+                'ms': f'{record["wall_ms"]:.1f}',
+                'Rows': '' if record['rows'] is None else record['rows'],
+                'Cache': record['cache'] or '',
+            }
+            for record in records
+        ])
@@ -13,3 +13,9 @@ colour_palette = {
     "Tangerine": "#fb8500",
 }
 
+# Feedback score bucket colours (see feedback_lib.score_buckets)
+score_colours = {
+    "negative": "#c0392b",
+    "neutral": "#2980b9",
+    "positive": "#27ae60",
+}
@@ -0,0 +1,149 @@
+# search_lib.py
+
+# Module Imports
+import math
+import re
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+
+from pandas import DataFrame
+
+from data_sources.versioning import data_version
+from src.profiling import profiled
+from src.util import get_or_build
+
+'''
+Full-Text Search
+- Inverted index over free_text built once per data version: term -> {row position: token positions}
+- Queries combine plain terms, prefix terms (heat*) and "quoted phrases"; every part must match
+- Matches are ranked with BM25 and returned as row positions, so they combine with the
+  filter_lib bitmaps like any other filter
+'''
+
+# Shared cache of search indexes by data version
+SEARCH_CACHE = 'search_index'
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Maximum number of terms a prefix expands to
+MAX_PREFIX_TERMS = 50
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+
+
+class SearchIndex(NamedTuple):
+    n_rows: int
+    # term -> {row position: [token positions]}
+    postings: Dict[str, Dict[int, List[int]]]
+    # sorted terms (for prefix lookups)
+    terms: List[str]
+    # tokens per row
+    lengths: np.ndarray
+
+
+# Lower-case word tokens of a text
+def tokenize(text) -> List[str]:
+    if not isinstance(text, str):
+        return []
+    return _TOKEN.findall(text.lower())
+
+# Build the index for a column of texts
+def build_search_index(df: DataFrame, column: str = 'free_text') -> SearchIndex:
+    postings = {}
+    lengths = np.zeros(len(df), dtype='int64')
+    for row, text in enumerate(df[column]):
+        tokens = tokenize(text)
+        lengths[row] = len(tokens)
+        for position, token in enumerate(tokens):
+            postings.setdefault(token, {}).setdefault(row, []).append(position)
+    return SearchIndex(len(df), postings, sorted(postings), lengths)
+
+# Index for a loaded frame (cached per data version)
+@profiled()
+def search_index(df: DataFrame, column: str = 'free_text') -> SearchIndex:
+    return get_or_build(SEARCH_CACHE, (data_version(df), column), lambda: build_search_index(df, column))
+
+
+'''
+Queries
+'''
+# Terms starting with a prefix
+def expand_prefix(index: SearchIndex, prefix: str) -> List[str]:
+    start = bisect_left(index.terms, prefix)
+    matches = []
+    for term in index.terms[start:start + MAX_PREFIX_TERMS]:
+        if not term.startswith(prefix):
+            break
+        matches.append(term)
+    return matches
+
+# Whether a row contains the tokens as consecutive words
+def _has_phrase(index: SearchIndex, tokens: List[str], row: int) -> bool:
+    positions = [set(index.postings[token][row]) for token in tokens]
+    return any(
+        all(start + offset in positions[offset] for offset in range(1, len(tokens)))
+        for start in positions[0]
+    )
+
+# Rows containing a phrase
+def _phrase_rows(index: SearchIndex, tokens: List[str]) -> set:
+    if any(token not in index.postings for token in tokens):
+        return set()
+    rows = set(index.postings[tokens[0]])
+    for token in tokens[1:]:
+        rows &= set(index.postings[token])
+    return {row for row in rows if _has_phrase(index, tokens, row)}
+
+# BM25 weight of a term in the rows it occurs in
+def _bm25(index: SearchIndex, term: str) -> Dict[int, float]:
+    postings = index.postings.get(term, {})
+    if not postings:
+        return {}
+    idf = math.log(1 + (index.n_rows - len(postings) + 0.5) / (len(postings) + 0.5))
+    average_length = max(index.lengths.mean(), 1.0)
+    return {
+        row: idf * len(positions) * (BM25_K1 + 1)
+        / (len(positions) + BM25_K1 * (1 - BM25_B + BM25_B * index.lengths[row] / average_length))
+        for row, positions in postings.items()
+    }
+
+# Row positions matching a query, best match first
+def search(index: SearchIndex, query: str) -> np.ndarray:
+    matched = None
+    scores = {}
+    for phrase, word in _QUERY_PART.findall(query.lower()):
+        if phrase:
+            tokens = tokenize(phrase)
+            if not tokens:
+                continue
+            rows = _phrase_rows(index, tokens)
+            terms = tokens
+        elif word.endswith('*'):
+            tokens = tokenize(word[:-1])
+            if not tokens:
+                continue
+            terms = expand_prefix(index, tokens[-1])
+            rows = set().union(*(index.postings[term] for term in terms))
+        else:
+            tokens = tokenize(word)
+            if not tokens:
+                continue
+            rows = _phrase_rows(index, tokens) if len(tokens) > 1 else set(index.postings.get(tokens[0], {}))
+            terms = tokens
+        matched = rows if matched is None else matched & rows
+        for term in terms:
+            for row, score in _bm25(index, term).items():
+                if row in rows:
+                    scores[row] = scores.get(row, 0.0) + score
+    if matched is None:
+        return np.arange(index.n_rows)
+    return np.array(sorted(matched, key=lambda row: (-scores.get(row, 0.0), row)), dtype='int64')
+
+# Packed bitmap of row positions (same layout as filter_lib bitmaps)
+def positions_bitmap(n_rows: int, positions: np.ndarray) -> np.ndarray:
+    mask = np.zeros(n_rows, dtype=bool)
+    mask[positions] = True
+    return np.packbits(mask)
@@ -1,31 +1,126 @@
 # summary_lib.py
 
 # Module Imports
+from typing import Dict, NamedTuple, Tuple
+
 import pandas as pd
 
 from pandas import DataFrame
 
+from data_sources.schema import enforce_schema
+from data_sources.versioning import data_version, set_version
+from src.profiling import profiled
+from src.util import get_or_build
+
+"""
+Summary Data
+- The Type / Description / Number table (layout of the summary sheet) derived from the feedback rows
+  in one grouped pass, so the response counts always match the feedback and need no sheet of their own
+- Respondents are the distinct response_id values; "Contactable" is derived when the feedback carries a
+  contactable column and otherwise carried over from the summary sheet (the feedback has no contact details yet)
+"""
+
+# Respondent attributes broken down in the summary
+SUMMARY_TYPES = ['resident_type', 'building_name', 'building_floor', 'resident_length']
+# Shared cache of derived summaries by feedback data version
+SUMMARY_DATA_CACHE = 'summary_data'
+
+
+# "Contactable" total of a summary sheet (None if it has none)
+def _sheet_contactable(df_sheet: DataFrame):
+    if df_sheet is None:
+        return None
+    numbers = df_sheet.loc[(df_sheet["Type"] == "all") & (df_sheet["Description"] == "Contactable"), "Number"].dropna()
+    return int(numbers.iloc[0]) if len(numbers) else None
+
+# Build the summary table from feedback rows
+# - df_sheet: optional summary sheet the Contactable total is taken from when the feedback has no contactable column
+def build_summary_data(df_feedback: DataFrame, df_sheet: DataFrame = None) -> DataFrame:
+    respondents = df_feedback[df_feedback["response_id"].notna()].drop_duplicates("response_id")
+    totals = {"Responses": len(respondents)}
+    if "contactable" in respondents.columns:
+        contactable = int(respondents["contactable"].fillna(False).astype(bool).sum())
+    else:
+        contactable = _sheet_contactable(df_sheet)
+    if contactable is not None:
+        totals["Contactable"] = contactable
+    counts = (
+        respondents[SUMMARY_TYPES]
+        .astype("object")
+        .melt(var_name="Type", value_name="Description")
+        .dropna()
+        .groupby(["Type", "Description"], sort=False)
+        .size()
+        .reset_index(name="Number")
+    )
+    counts["Type"] = pd.Categorical(counts["Type"], categories=SUMMARY_TYPES)
+    counts = counts.sort_values(["Type", "Description"], kind="stable")
+    df = pd.concat([
+        pd.DataFrame({"Description": list(totals), "Type": "all", "Number": list(totals.values())}),
+        counts[["Description", "Type", "Number"]].astype({"Type": "object"}),
+    ], ignore_index=True)
+    return enforce_schema(df, "summary")
+
+# Summary for a loaded feedback frame (cached per data version, and stamped with a version derived from it)
+@profiled()
+def summary_data(df_feedback: DataFrame, df_sheet: DataFrame = None) -> DataFrame:
+    version = data_version(df_feedback)
+    if df_sheet is not None:
+        version = f"{version}+{data_version(df_sheet)}"
+    return get_or_build(
+        SUMMARY_DATA_CACHE,
+        version,
+        lambda: set_version(build_summary_data(df_feedback, df_sheet), f"summary:{version}"),
+    )
+
+"""
+Summary Index
+- (Type, Description) -> Number lookup and the rows of each Type, built in one pass over the summary
+  data and cached per data version, so metrics and chart inputs are lookups instead of table scans
+"""
+
+# Shared cache of summary indexes by data version
+SUMMARY_CACHE = 'summary_index'
+
+
+class SummaryIndex(NamedTuple):
+    # (Type, Description) -> Number
+    numbers: Dict[Tuple[str, str], int]
+    # Type -> summary rows of that type
+    by_type: Dict[str, DataFrame]
+
+
+# Build the index for a summary frame
+def build_summary_index(df: DataFrame) -> SummaryIndex:
+    numbers = {
+        (str(summary_type), str(description)): number
+        for summary_type, description, number in zip(df["Type"], df["Description"], df["Number"])
+    }
+    by_type = {
+        str(summary_type): rows
+        for summary_type, rows in df.groupby("Type", observed=True, sort=False)
+    }
+    return SummaryIndex(numbers, by_type)
+
+# Index for a loaded summary frame (cached per data version; treat as read-only)
+@profiled()
+def summary_index(df: DataFrame) -> SummaryIndex:
+    return get_or_build(SUMMARY_CACHE, data_version(df), lambda: build_summary_index(df))
+
+# Number for one (Type, Description), e.g. ("resident_type", "Tenant")
+def summary_number(df: DataFrame, summary_type: str, description: str, default: int = 0) -> int:
+    number = summary_index(df).numbers.get((summary_type, description))
+    return default if number is None or pd.isna(number) else int(number)
+
+
 """
 Filtering Functions
 """
 
 # Filter Summary data
+# - one of: all, resident_type, building_name, building_floor, resident_length
 def filter_summary_data(df: DataFrame, filter_type: str) -> DataFrame:
-    # All Data
-    if filter_type.lower() == "all":
-        return df[df["Type"] == "all"]
-    # Resident Type Data
-    elif filter_type.lower() == "resident_type":
-        return df[df["Type"] == "resident_type"]
-    # Building Name Data
-    elif filter_type.lower() == "building_name":
-        return df[df["Type"] == "building_name"]
-    # Building Floor Data
-    elif filter_type.lower() == "building_floor":
-        return df[df["Type"] == "building_floor"]
-    # Resident Length Data
-    elif filter_type.lower() == "resident_length":
-        return df[df["Type"] == "resident_length"]
+    return summary_index(df).by_type.get(filter_type.lower(), df.iloc[0:0])
 
 
 """
@@ -33,38 +128,29 @@ Metric Functions
 """
 # All residents
 def metric_residents_all(df: DataFrame) -> int:
-    return int(df[(df["Description"] == "Responses") & (df["Type"] == "all")]["Number"])
+    return summary_number(df, "all", "Responses")
 
 
 # Contactable residents
 def metric_residents_contactable(df: DataFrame) -> int:
-    return int(
-        df[(df["Description"] == "Contactable") & (df["Type"] == "all")]["Number"]
-    )
+    return summary_number(df, "all", "Contactable")
+
+
+# Share of all residents with a resident type (%)
+def _resident_type_percentage(df: DataFrame, resident_type: str) -> float:
+    total_all = metric_residents_all(df)
+    total_type = summary_number(df, "resident_type", resident_type)
+    return float(round((total_type / total_all) * 100, 2))
 
 
 # Leaseholder (%)
 def metric_residents_leaseholder(df: DataFrame) -> int:
-    total_all = metric_residents_all(df)
-    total_leaseholder = int(
-        df[(df["Description"] == "Leaseholder") & (df["Type"] == "resident_type")][
-            "Number"
-        ]
-    )
-    return float(round((total_leaseholder / total_all) * 100, 2))
+    return _resident_type_percentage(df, "Leaseholder")
 
 # Non-Resident Leaseholder (%)
 def metric_residents_nonresident_leaseholder(df: DataFrame) -> int:
-    total_all = metric_residents_all(df)
-    total_tenant = int(
-        df[(df["Description"] == "Non-resident leaseholder") & (df["Type"] == "resident_type")]["Number"]
-    )
-    return float(round((total_tenant / total_all) * 100, 2))
+    return _resident_type_percentage(df, "Non-resident leaseholder")
 
 # Tenant (%)
 def metric_residents_tenant(df: DataFrame) -> int:
-    total_all = metric_residents_all(df)
-    total_tenant = int(
-        df[(df["Description"] == "Tenant") & (df["Type"] == "resident_type")]["Number"]
-    )
-    return float(round((total_tenant / total_all) * 100, 2))
+    return _resident_type_percentage(df, "Tenant")
@@ -0,0 +1,46 @@
+# topic_lib.py
+
+# Module Imports
+from typing import Dict, List
+
+from pandas import DataFrame
+
+from data_sources.versioning import data_version
+from src.profiling import profiled
+from src.util import get_or_build
+
+'''
+Topic Index
+- Nested mapping feedback_category -> topic -> ordered list of top words, built in one pass over
+  the topics data and cached per data version
+'''
+
+# Category holding the topics of all feedback
+ALL_CATEGORY = 'All'
+# Shared cache of topic indexes by data version
+TOPIC_CACHE = 'topic_index'
+
+
+# Build the index (topics sorted within each category, words kept in sheet order)
+def build_topic_index(df_topics: DataFrame) -> Dict[str, Dict[object, List[str]]]:
+    index = {}
+    for category, topic, word in zip(df_topics['feedback_category'], df_topics['topic'], df_topics['word']):
+        index.setdefault(category, {}).setdefault(topic, []).append(word)
+    return {
+        category: {topic: topics[topic] for topic in sorted(topics)}
+        for category, topics in index.items()
+    }
+
+# Index for a loaded topics frame (cached per data version; treat as read-only)
+@profiled()
+def topic_index(df_topics: DataFrame) -> Dict[str, Dict[object, List[str]]]:
+    return get_or_build(TOPIC_CACHE, data_version(df_topics), lambda: build_topic_index(df_topics))
+
+# Feedback categories with topics, 'All' first
+def topic_categories(index: dict) -> List[str]:
+    categories = sorted(category for category in index if category != ALL_CATEGORY)
+    return ([ALL_CATEGORY] if ALL_CATEGORY in index else []) + categories
+
+# Topics of one category as 'topic: word, word, ...' lines
+def topic_lines(index: dict, category: str) -> List[str]:
+    return [f'{topic}: {", ".join(words)}' for topic, words in index.get(category, {}).items()]
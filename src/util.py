@@ -2,7 +2,14 @@
 ## Utilities for the Streamlit app
 
 ## Library Imports
+import os
+import sys
+import threading
+
 import streamlit as st 
+from cachetools import LRUCache
+
+from src.profiling import mark_cache
 
 ## Footer Definition
 def add_footer():
@@ -56,4 +63,76 @@ def add_footer():
 
     </div>
     """
-    st.write(ft, unsafe_allow_html=True)
\ No newline at end of file
+    st.write(ft, unsafe_allow_html=True)
+
+## Shared Caches
+# Approximate memory held by a cached value (arrays, frames, bytes and tuples / dicts of them)
+def value_nbytes(value) -> int:
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, tuple):
+        return sum(value_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(value_nbytes(item) for item in value.values())
+    if hasattr(value, 'memory_usage') and hasattr(value, 'columns'):
+        return int(value.memory_usage(index=True).sum())
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+# One bounded LRU per cache name, shared by every session (values are returned as-is, treat them as read-only)
+# - max_bytes: bound by the total value_nbytes of the entries instead of their count
+@st.experimental_singleton()
+def shared_cache(name: str, max_entries: int = 8, max_bytes: int = None) -> LRUCache:
+    if max_bytes is not None:
+        return LRUCache(maxsize=max_bytes, getsizeof=value_nbytes)
+    return LRUCache(maxsize=max_entries)
+
+_shared_cache_lock = threading.Lock()
+
+# Value for a key from a shared cache (None on a miss)
+def get_cached(cache_name: str, key, max_entries: int = 8, max_bytes: int = None):
+    cache = shared_cache(cache_name, max_entries, max_bytes)
+    with _shared_cache_lock:
+        value = cache.get(key)
+    mark_cache(value is not None)
+    return value
+
+# Value for a key from a shared cache, built (outside the lock) on a miss
+# - a value larger than the whole max_bytes budget is returned without being cached
+def get_or_build(cache_name: str, key, build, max_entries: int = 8, max_bytes: int = None):
+    cache = shared_cache(cache_name, max_entries, max_bytes)
+    with _shared_cache_lock:
+        if key in cache:
+            mark_cache(True)
+            return cache[key]
+    mark_cache(False)
+    value = build()
+    with _shared_cache_lock:
+        if cache.getsizeof(value) <= cache.maxsize:
+            cache[key] = value
+    return value
+
+
+## Static Files
+# Contents of a file read once per process (the modification time is part of the key, so a rewritten file is re-read)
+def static_bytes(path: str) -> bytes:
+    def _read():
+        with open(path, 'rb') as f:
+            return f.read()
+    return get_or_build('static_files', (path, os.stat(path).st_mtime_ns), _read)
+
+
+## Table Pagination
+# Page sizes offered for paginated tables
+TABLE_PAGE_SIZES = [25, 50, 100, 250]
+
+# Number of pages for a table (at least one, so an empty result still has a page)
+def page_count(n_rows: int, page_size: int) -> int:
+    return max(-(-n_rows // page_size), 1)
+
+# Start/stop row positions of a page (pages are numbered from 1)
+def page_bounds(n_rows: int, page_size: int, page: int):
+    page = min(max(int(page), 1), page_count(n_rows, page_size))
+    start = (page - 1) * page_size
+    return start, min(start + page_size, n_rows)
@@ -0,0 +1,42 @@
+# test_filter_lib.py
+
+# Module Imports
+import numpy as np
+import pandas as pd
+
+from src import filter_lib
+
+
+# Feedback rows with the filter and (float32) range columns
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        'feedback_category': ['Lifts', 'Heating', 'Lifts', 'Communal Areas'],
+        'building_name': ['Alpha', 'Beta', 'Beta', 'Alpha'],
+        'sentiment': ['negative', 'neutral', 'positive', 'negative'],
+        'polarity': np.array([-0.5, 0.0, 0.3, -0.9], dtype='float32'),
+        'subjectivity': np.array([0.2, 0.5, 0.8, 0.1], dtype='float32'),
+    })
+
+
+def test_options_after_range_columns():
+    index = filter_lib.build_filter_index(_frame())
+    assert filter_lib.options(index, 'feedback_category') == ['Communal Areas', 'Heating', 'Lifts']
+    assert filter_lib.options(index, 'building_name') == ['Alpha', 'Beta']
+
+
+def test_select_ranges():
+    index = filter_lib.build_filter_index(_frame())
+    selection = filter_lib.select(index, ranges={'polarity': (0.0, 0.3), 'subjectivity': (0.0, 1.0)})
+    assert filter_lib.positions(index, selection).tolist() == [1, 2]
+    selection = filter_lib.select(index, ranges={'polarity': (-1.0, 1.0)}, building_name='Alpha')
+    assert filter_lib.positions(index, selection).tolist() == [0, 3]
+
+
+def test_full_ranges_keep_missing_values():
+    df = _frame()
+    df.loc[1, 'polarity'] = np.nan
+    index = filter_lib.build_filter_index(df)
+    selection = filter_lib.select(index, ranges=dict(filter_lib.RANGE_BOUNDS))
+    assert filter_lib.positions(index, selection).tolist() == [0, 1, 2, 3]
+    selection = filter_lib.select(index, ranges={'polarity': (-1.0, 0.5)})
+    assert filter_lib.positions(index, selection).tolist() == [0, 2, 3]